@@ -1,11 +1,16 @@
 import logging
 from collections import Counter, defaultdict
-from typing import List, Set, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain, count
+from typing import AbstractSet, Any, Callable, List, NamedTuple, Set, Dict, Tuple, Optional, Iterable, Iterator
 from pathlib import Path
 import datetime
-import time
+import sys
 
-from .apis.base import CitationAPI
+from tqdm import tqdm
+
+from .apis.base import INCOMPLETE_STAT, CitationAPI, NotFoundError
+from .cache import MISS, NEGATIVE_TTL, ResponseCache
 from .ris_parser import extract_dois_from_ris, extract_identifiers_from_ris
 
 logger = logging.getLogger(__name__)
@@ -13,88 +18,456 @@ logger = logging.getLogger(__name__)
 # Type alias for clarity
 Doi = str
 Identifier = str  # Can be either DOI or MAG ID
-# Define structure for summary data
-SummaryRecord = Dict[str, any] # E.g., {'doi': ..., 'references_found': ..., 'citations_found': ..., 'api': ..., 'timestamp': ..., 'api_contributions': ...}
 # Define structure for detailed results (list of relationships)
 ResultRecord = Dict[str, Doi] # E.g., {'novel_doi': ..., 'initial_doi': ...}
 # Define structure for raw fetched data per initial DOI - enhanced for composite API
 RawDataRecord = Dict[str, Optional[List[Doi]]] # E.g. {'references': [...], 'citations': [...]}
 # Define structure for API contribution data
 APIContributions = Dict[str, Dict[str, int]] # E.g., {'references': {'OpenAlex': 33, 'SemanticScholar': 28, 'Overlap': 27, 'OpenAlex_unique': 6, 'SemanticScholar_unique': 1, 'Total_unique': 34}}
+# Define structure for the result of fetching one identifier: (timestamp, references, citations, api_contributions)
+FetchResult = Tuple[str, Optional[List[Doi]], Optional[List[Doi]], Optional[APIContributions]]
+# Per-API contribution statistics reported by CompositeAPI, in summary column order
+CONTRIBUTION_KEYS = ('OpenAlex', 'SemanticScholar', 'Overlap', 'OpenAlex_unique', 'SemanticScholar_unique', 'Total_unique')
+# Receives each initial identifier's raw record as soon as it is fetched, e.g. to write it to disk
+RawDataSink = Callable[[Identifier, RawDataRecord], None]
+
+
+class SummaryRecord(NamedTuple):
+    """
+    Summary row for one initial identifier.
+
+    A NamedTuple rather than a dict: one summary row is kept per initial identifier, and a tuple
+    carries no per-instance key table. Contribution columns are None when the API client does not
+    report per-source statistics, which leaves them blank in summary.csv.
+    """
+    doi: Identifier  # Keep 'doi' field name for compatibility, but it may contain MAG ID
+    references_found: int
+    citations_found: int
+    api: str
+    retrieval_timestamp: str
+    references_OpenAlex: Optional[int] = None
+    references_SemanticScholar: Optional[int] = None
+    references_Overlap: Optional[int] = None
+    references_OpenAlex_unique: Optional[int] = None
+    references_SemanticScholar_unique: Optional[int] = None
+    references_Total_unique: Optional[int] = None
+    citations_OpenAlex: Optional[int] = None
+    citations_SemanticScholar: Optional[int] = None
+    citations_Overlap: Optional[int] = None
+    citations_OpenAlex_unique: Optional[int] = None
+    citations_SemanticScholar_unique: Optional[int] = None
+    citations_Total_unique: Optional[int] = None
+
+    def asdict(self) -> Dict[str, Any]:
+        """Returns the record as a dict, for code that expects the previous dict-based records."""
+        return self._asdict()
+
+# Number of identifiers fetched concurrently; the work is dominated by HTTP round-trips
+DEFAULT_MAX_WORKERS = 8
+# Cache "method" under which identifiers the API reported as unknown are remembered
+MISSING_KEY = 'missing'
 
 class CocitationAnalyzer:
-    def __init__(self, api_client: CitationAPI, initial_dois: Set[Doi], initial_mag_ids: Set[Identifier] = None):
+    def __init__(self, api_client: CitationAPI, initial_dois: AbstractSet[Doi], initial_mag_ids: Optional[AbstractSet[Identifier]] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS, cache: Optional[ResponseCache] = None):
         """
         Initializes the analyzer with an API client and the initial set of DOIs and MAG IDs.
 
         Args:
             api_client: An instance of a class implementing CitationAPI.
-            initial_dois: A set of DOIs extracted from the input RIS file.
-            initial_mag_ids: A set of MAG IDs extracted from the input RIS file.
+            initial_dois: A set (or frozenset) of DOIs extracted from the input RIS file.
+            initial_mag_ids: A set (or frozenset) of MAG IDs extracted from the input RIS file.
+            max_workers: Maximum number of identifiers fetched concurrently.
+            cache: Optional persistent cache of fetched references/citations, keyed by (api, method, identifier).
         """
-        if not isinstance(initial_dois, set):
-            raise TypeError("initial_dois must be a set")
-        if initial_mag_ids is not None and not isinstance(initial_mag_ids, set):
-            raise TypeError("initial_mag_ids must be a set")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
         
         self.api_client = api_client
-        self.initial_dois = initial_dois
-        self.initial_mag_ids = initial_mag_ids or set()
+        # Constant for the analyzer's lifetime; resolved once instead of per identifier
+        self.api_name = type(api_client).__name__
+        # Intern identifiers so equal DOIs across all fetched lists share one string object.
+        # Stored as frozensets: the initial set is fixed for the analyzer's lifetime.
+        self.initial_dois = frozenset(sys.intern(doi) for doi in initial_dois)
+        self.initial_mag_ids = frozenset(sys.intern(mag_id) for mag_id in initial_mag_ids or ())
+        self.max_workers = max_workers
+        self.cache = cache
+        # Identifiers the API reported as unknown (e.g. 404); also persisted to the cache if one is set
+        self.known_missing: Set[Identifier] = set()
         
-        # Create combined set of all identifiers for processing
-        self.all_identifiers = initial_dois | self.initial_mag_ids
+        # Create combined set of all identifiers for processing; also used to filter initial
+        # identifiers out of fetched lists with a single C-level set difference
+        self.all_identifiers = self.initial_dois | self.initial_mag_ids
+        # Identifier type label used in log messages, classified once per identifier
+        self._id_type: Dict[Identifier, str] = {
+            identifier: ("MAG ID" if identifier.isdigit() else "DOI") for identifier in self.all_identifiers
+        }
         
-        logger.info(f"Analyzer initialized with {len(initial_dois)} initial DOIs and {len(self.initial_mag_ids)} initial MAG IDs.")
+        logger.info(f"Analyzer initialized with {len(self.initial_dois)} initial DOIs and {len(self.initial_mag_ids)} initial MAG IDs.")
+
+    def _fetch_direction(self, identifier: Identifier, method: str, api_name: str) -> Tuple[Optional[List[Doi]], Optional[Dict[str, int]], bool]:
+        """
+        Fetches one direction ('references' or 'citations') for an identifier, consulting the cache first.
+
+        Returns:
+            A tuple of (dois, contribution_stats, from_cache). Empty results are cached too, for
+            NEGATIVE_TTL, so identifiers known to have no references/citations are not queried again
+            until the services may have caught up. Failures raise instead and are never cached.
+        """
+        key = (api_name, method, identifier)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not MISS:
+                logger.debug(f"Cache hit for {method} of {identifier} ({api_name})")
+                return self._intern_all(cached['dois']), cached['stats'], True
+
+        stats = None
+        if hasattr(self.api_client, f'get_{method}_with_stats'):
+            dois, stats = getattr(self.api_client, f'get_{method}_with_stats')(identifier)
+        else:
+            dois = getattr(self.api_client, f'get_{method}')(identifier)
+
+        self._store(key, dois, stats)
+        return self._intern_all(dois), stats, False
+
+    def _store(self, key: Tuple[str, str, Identifier], dois: Optional[List[Doi]], stats: Optional[Dict[str, int]]) -> None:
+        """Caches a fetched direction, unless it is missing or merged from only some of the sources."""
+        if self.cache is None or dois is None:
+            return
+        if stats and stats.get(INCOMPLETE_STAT):
+            logger.debug(f"Not caching incomplete {key[1]} of {key[2]} ({key[0]})")
+            return
+        self.cache.set(key, {'dois': dois, 'stats': stats}, expire=None if dois else NEGATIVE_TTL)
+
+    @staticmethod
+    def _intern_all(dois: Optional[List[Doi]]) -> Optional[List[Doi]]:
+        """
+        Interns fetched DOIs. The same DOI typically appears in the lists of many initial papers;
+        interning makes the copies share one object, so the hash is computed once and equality
+        checks in the counting sets short-circuit on identity.
+        """
+        if dois is None:
+            return None
+        return [sys.intern(doi) for doi in dois]
+
+    def _is_known_missing(self, identifier: Identifier) -> bool:
+        """Returns True if the API already reported `identifier` as unknown, in this run or a cached one."""
+        if identifier in self.known_missing:
+            return True
+        if self.cache is not None and self.cache.get((self.api_name, MISSING_KEY, identifier)) is not MISS:
+            self.known_missing.add(identifier)
+            return True
+        return False
+
+    def _mark_missing(self, identifier: Identifier) -> None:
+        """Records that the API does not know `identifier`, so it is not requested again."""
+        self.known_missing.add(identifier)
+        if self.cache is not None:
+            self.cache.set((self.api_name, MISSING_KEY, identifier), True, expire=NEGATIVE_TTL)
 
     def _fetch_data_for_identifier(self, identifier: Identifier, fetch_references: bool, fetch_citations: bool) -> Tuple[Optional[List[Doi]], Optional[List[Doi]], Optional[APIContributions]]:
         """Fetches references and/or citations for a single identifier (DOI or MAG ID) using the API client."""
         references = None
         citations = None
         api_contributions = None
-        # Use a generic API name for now, could be enhanced later if multiple APIs are used
-        api_name = type(self.api_client).__name__ 
-        id_type = "MAG ID" if identifier.isdigit() else "DOI"
+        api_name = self.api_name
+        id_type = self._id_type[identifier]
+        if self._is_known_missing(identifier):
+            logger.info(f"Skipping {id_type} {identifier}: previously not found by {api_name}")
+            return None, None, None
         try:
             if fetch_references:
                 logger.debug(f"Fetching references for {id_type} {identifier} using {api_name}")
-                if hasattr(self.api_client, 'get_references_with_stats'):
-                    references, ref_stats = self.api_client.get_references_with_stats(identifier)
+                references, ref_stats, _ = self._fetch_direction(identifier, 'references', api_name)
+                if ref_stats is not None:
                     api_contributions = {'references': ref_stats}
-                else:
-                    references = self.api_client.get_references(identifier)
-                # Add a small delay *after* potential successful calls
-                if references is not None:
-                    time.sleep(0.1) 
             if fetch_citations:
                 logger.debug(f"Fetching citations for {id_type} {identifier} using {api_name}")
-                if hasattr(self.api_client, 'get_citations_with_stats'):
-                    citations, cite_stats = self.api_client.get_citations_with_stats(identifier)
+                citations, cite_stats, _ = self._fetch_direction(identifier, 'citations', api_name)
+                if cite_stats is not None:
                     if api_contributions is None:
                         api_contributions = {}
                     api_contributions['citations'] = cite_stats
-                else:
-                    citations = self.api_client.get_citations(identifier)
-                # Add a small delay *after* potential successful calls
-                if citations is not None:
-                    time.sleep(0.1) 
+        except NotFoundError:
+            # Unknown to the API: a citations request would 404 as well, so don't issue it
+            logger.warning(f"{id_type} {identifier} not found by {api_name}; skipping further requests for it")
+            self._mark_missing(identifier)
+            return None, None, None
         except Exception as e:
             logger.error(f"Error fetching data for {id_type} {identifier} using {api_name}: {e}")
         # Return the actual lists (or None if error/not fetched) and contribution stats
         return references, citations, api_contributions
 
-    def run_analysis(self, min_references_n: int, min_citations_m: int) -> Tuple[List[SummaryRecord], List[ResultRecord], List[ResultRecord], Dict[Doi, RawDataRecord]]:
+    def _fetch_direction_batch(self, identifiers: List[Identifier], method: str) -> Dict[Identifier, Tuple[Optional[List[Doi]], Optional[Dict[str, int]]]]:
+        """
+        Batch counterpart of _fetch_direction: cached identifiers are served from the cache and
+        the rest are fetched with a single get_{method}_batch(_with_stats) call.
+
+        Identifiers the API reports as unknown are recorded via _mark_missing and left out of the result;
+        identifiers the API failed to fetch map to (None, None) and are not cached.
+
+        Returns:
+            Dictionary mapping each identifier to (dois, contribution_stats).
+        """
+        api_name = self.api_name
+        results: Dict[Identifier, Tuple[Optional[List[Doi]], Optional[Dict[str, int]]]] = {}
+        pending: List[Identifier] = []
+        for identifier in identifiers:
+            cached = self.cache.get((api_name, method, identifier)) if self.cache is not None else MISS
+            if cached is MISS:
+                pending.append(identifier)
+            else:
+                logger.debug(f"Cache hit for {method} of {identifier} ({api_name})")
+                results[identifier] = (self._intern_all(cached['dois']), cached['stats'])
+        if not pending:
+            return results
+
+        if hasattr(self.api_client, f'get_{method}_batch_with_stats'):
+            fetched = getattr(self.api_client, f'get_{method}_batch_with_stats')(pending)
+        else:
+            fetched = {
+                identifier: None if dois is None else (dois, None)
+                for identifier, dois in getattr(self.api_client, f'get_{method}_batch')(pending).items()
+            }
+
+        for identifier in pending:
+            if identifier in fetched and fetched[identifier] is None:
+                logger.warning(f"{identifier} not found by {api_name}; skipping further requests for it")
+                self._mark_missing(identifier)
+                continue
+            dois, stats = fetched.get(identifier, (None, None))
+            self._store((api_name, method, identifier), dois, stats)
+            results[identifier] = (self._intern_all(dois), stats)
+        return results
+
+    def _fetch_batch_direction(self, identifiers: List[Identifier], method: str) -> Dict[Identifier, Tuple[Optional[List[Doi]], Optional[Dict[str, int]]]]:
+        """
+        Fetches one direction for a batch, leaving out identifiers already known to be missing.
+        Errors are logged and yield an empty result.
+        """
+        remaining = [identifier for identifier in identifiers if not self._is_known_missing(identifier)]
+        if not remaining:
+            return {}
+        logger.debug(f"Fetching {method} for batch of {len(remaining)} identifiers using {self.api_name}")
+        try:
+            return self._fetch_direction_batch(remaining, method)
+        except Exception as e:
+            logger.error(f"Error fetching {method} for batch of {len(remaining)} identifiers using {self.api_name}: {e}")
+            return {}
+
+    def _combine_batch(self, identifiers: List[Identifier], directions: Dict[str, Dict[Identifier, Tuple[Optional[List[Doi]], Optional[Dict[str, int]]]]]) -> Dict[Identifier, Tuple[Optional[List[Doi]], Optional[List[Doi]], Optional[APIContributions]]]:
+        """Joins the per-direction results of a batch into (references, citations, api_contributions) per identifier."""
+        results = {}
+        for identifier in identifiers:
+            if identifier in self.known_missing:
+                results[identifier] = (None, None, None)
+                continue
+            references, ref_stats = directions.get('references', {}).get(identifier, (None, None))
+            citations, cite_stats = directions.get('citations', {}).get(identifier, (None, None))
+            api_contributions = None
+            if ref_stats is not None:
+                api_contributions = {'references': ref_stats}
+            if cite_stats is not None:
+                if api_contributions is None:
+                    api_contributions = {}
+                api_contributions['citations'] = cite_stats
+            results[identifier] = (references, citations, api_contributions)
+        return results
+
+    def _iter_fetched(self, fetch_references: bool, fetch_citations: bool) -> Iterator[Tuple[Identifier, FetchResult]]:
+        """
+        Fetches data for every initial identifier using a bounded thread pool.
+
+        Each fetch spends nearly all of its time waiting on HTTP responses, so running up to
+        `max_workers` of them at once overlaps those waits instead of paying them one after another.
+        If the client declares a BATCH_SIZE above 1, identifiers are grouped into batches of that
+        size and each worker fetches one direction of a whole batch through the client's
+        get_*_batch methods, so a batch's references and citations are fetched concurrently.
+
+        Progress is shown as a tqdm bar over the initial identifiers.
+
+        Yields:
+            (identifier, (timestamp, references, citations, api_contributions)) in completion order, so
+            callers can aggregate each result while the remaining fetches are still in flight.
+        """
+        identifiers = list(self.all_identifiers)
+        total_initial = len(identifiers)
+        progress = count(1)
+        batch_size = max(1, getattr(self.api_client, 'BATCH_SIZE', 1))
+        # Log progress at INFO roughly every 1% of identifiers; the per-identifier line is DEBUG
+        progress_step = max(1, total_initial // 100)
+
+        def fetch(identifier: Identifier) -> List[Tuple[Identifier, FetchResult]]:
+            id_type = self._id_type[identifier]
+            processed_count = next(progress)
+            logger.debug(f"Processing ({processed_count}/{total_initial}) {id_type}: {identifier}")
+            if processed_count % progress_step == 0 or processed_count == total_initial:
+                logger.info(f"Processing identifier {processed_count}/{total_initial}")
+            timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            references, citations, api_contributions = self._fetch_data_for_identifier(
+                identifier,
+                fetch_references=fetch_references,
+                fetch_citations=fetch_citations
+            )
+            return [(identifier, (timestamp, references, citations, api_contributions))]
+
+        methods = [method for method, enabled in (('references', fetch_references), ('citations', fetch_citations)) if enabled]
+        # Per batch: when its first direction started, and the directions fetched so far
+        batch_timestamps: Dict[int, str] = {}
+        batch_directions: Dict[int, Dict[str, Dict[Identifier, Tuple[Optional[List[Doi]], Optional[Dict[str, int]]]]]] = defaultdict(dict)
+
+        def fetch_batch_direction(index: int, method: str) -> Tuple[int, str, Dict[Identifier, Tuple[Optional[List[Doi]], Optional[Dict[str, int]]]]]:
+            batch_timestamps.setdefault(index, datetime.datetime.now(datetime.timezone.utc).isoformat())
+            logger.info(f"Fetching {method} for batch ({index + 1}/{total_batches}) of {len(batches[index])} identifiers")
+            return index, method, self._fetch_batch_direction(batches[index], method)
+
+        def batch_rows(index: int) -> List[Tuple[Identifier, FetchResult]]:
+            timestamp = batch_timestamps.get(index) or datetime.datetime.now(datetime.timezone.utc).isoformat()
+            fetched = self._combine_batch(batches[index], batch_directions.pop(index, {}))
+            return [(identifier, (timestamp,) + fetched[identifier]) for identifier in batches[index]]
+
+        with tqdm(total=total_initial, desc="Fetching initial identifiers", unit="id") as pbar, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if batch_size == 1:
+                futures = [executor.submit(fetch, identifier) for identifier in identifiers]
+                for future in as_completed(futures):
+                    rows = future.result()
+                    pbar.update(len(rows))
+                    yield from rows
+                return
+
+            batches = [identifiers[i:i+batch_size] for i in range(0, total_initial, batch_size)]
+            total_batches = len(batches)
+            if not methods:
+                for index in range(total_batches):
+                    rows = batch_rows(index)
+                    pbar.update(len(rows))
+                    yield from rows
+                return
+            # References and citations of a batch are independent requests, so they are fetched
+            # concurrently as separate tasks; a batch is yielded once all its directions are in
+            futures = [executor.submit(fetch_batch_direction, index, method) for index in range(total_batches) for method in methods]
+            for future in as_completed(futures):
+                index, method, result = future.result()
+                batch_directions[index][method] = result
+                if len(batch_directions[index]) == len(methods):
+                    rows = batch_rows(index)
+                    pbar.update(len(rows))
+                    yield from rows
+
+    @staticmethod
+    def _contribution_columns(stats: Optional[Dict[str, int]]) -> Tuple[Optional[int], ...]:
+        """Returns the summary columns for one direction's contribution stats, or blanks if there are none."""
+        if stats is None:
+            return (None,) * len(CONTRIBUTION_KEYS)
+        return tuple(stats.get(key, 0) for key in CONTRIBUTION_KEYS)
+
+    def _build_summary_record(self, identifier: Identifier, references: Optional[List[Doi]], citations: Optional[List[Doi]],
+                              api_contributions: Optional[APIContributions], timestamp: str) -> SummaryRecord:
+        """Builds the summary row for one initial identifier, including per-API contribution columns if available."""
+        contributions = api_contributions or {}
+        return SummaryRecord(
+            identifier,
+            len(references) if references is not None else 0,
+            len(citations) if citations is not None else 0,
+            self.api_name,
+            timestamp,
+            *self._contribution_columns(contributions.get('references')),
+            *self._contribution_columns(contributions.get('citations')),
+        )
+
+    def _aggregate(self, identifier: Identifier, references: Optional[List[Doi]], citations: Optional[List[Doi]],
+                   reference_candidates: Optional[Dict[Identifier, Set[Doi]]], citation_candidates: Optional[Dict[Identifier, Set[Doi]]]) -> None:
+        """
+        Records the de-duplicated, non-initial DOIs fetched for `identifier` as co-citation candidates.
+        Pass None for a direction that is not being analyzed to skip it entirely.
+        """
+        initial_set = self.all_identifiers
+        if reference_candidates is not None and references is not None:
+            reference_candidates[identifier] = set(references).difference(initial_set)
+        if citation_candidates is not None and citations is not None:
+            citation_candidates[identifier] = set(citations).difference(initial_set)
+
+    @staticmethod
+    def _count_candidates(candidate_sets: Dict[Identifier, Set[Doi]]) -> Counter:
+        """Counts, for each candidate DOI, how many initial identifiers it appears in."""
+        # A single Counter over the chained sets runs the counting loop in C
+        return Counter(chain.from_iterable(candidate_sets.values()))
+
+    @classmethod
+    def _prune_candidates(cls, candidate_sets: Dict[Identifier, Set[Doi]], threshold: int, remaining: int) -> int:
+        """
+        Removes candidate DOIs whose current count plus the `remaining` unprocessed identifiers is
+        below `threshold`; they cannot be reported, so there is no need to keep them.
+
+        Every candidate held has been seen at least once, so nothing can be pruned while
+        `remaining >= threshold - 1`; the (full) scan only runs in the last few iterations.
+        With nothing remaining, the final threshold filter does the same work, so it is skipped too.
+
+        Returns:
+            The number of pruned DOIs.
+        """
+        if remaining <= 0 or remaining >= threshold - 1:
+            return 0
+        counts = cls._count_candidates(candidate_sets)
+        hopeless = {doi for doi, n in counts.items() if n + remaining < threshold}
+        if hopeless:
+            for candidates in candidate_sets.values():
+                candidates.difference_update(hopeless)
+            logger.debug(f"Pruned {len(hopeless)} candidates that can no longer reach threshold {threshold} ({remaining} identifiers remaining)")
+        return len(hopeless)
+
+    @staticmethod
+    def _collect_edges(candidate_sets: Dict[Identifier, Set[Doi]], novel_dois: Set[Doi]) -> Dict[Doi, List[Identifier]]:
+        """Groups the initial identifiers whose candidate set contains each of `novel_dois`."""
+        edges: Dict[Doi, List[Identifier]] = defaultdict(list)
+        if not novel_dois:
+            return edges
+        for initial_identifier, candidates in candidate_sets.items():
+            for doi in novel_dois.intersection(candidates):
+                edges[doi].append(initial_identifier)
+        return edges
+
+    @staticmethod
+    def iter_backward_results(edges: Dict[Doi, List[Identifier]]) -> Iterator[ResultRecord]:
+        """Yields one backward result record per (novel DOI, initial citing identifier) pair."""
+        for referenced_doi, citing_initial_dois in edges.items():
+            logger.debug(f"Backward novel paper: {referenced_doi} (referenced by {len(citing_initial_dois)} initial DOIs)")
+            for initial_doi in citing_initial_dois:
+                yield {
+                    'novel_doi': referenced_doi,
+                    'initial_citing_doi': initial_doi
+                }
+
+    @staticmethod
+    def iter_forward_results(edges: Dict[Doi, List[Identifier]]) -> Iterator[ResultRecord]:
+        """Yields one forward result record per (novel DOI, initial cited identifier) pair."""
+        for citing_doi, cited_initial_dois in edges.items():
+            logger.debug(f"Forward novel paper: {citing_doi} (cites {len(cited_initial_dois)} initial DOIs)")
+            for initial_doi in cited_initial_dois:
+                yield {
+                    'novel_doi': citing_doi,
+                    'initial_cited_doi': initial_doi
+                }
+
+    def run_analysis(self, min_references_n: int, min_citations_m: int, materialize: bool = True, raw_sink: Optional[RawDataSink] = None) -> Tuple[List[SummaryRecord], Iterable[ResultRecord], Iterable[ResultRecord], Dict[Doi, RawDataRecord]]:
         """
         Performs backward and forward co-citation analysis in a single pass.
 
         Args:
             min_references_n: The minimum number (N) of initial articles that must reference a DOI for backward analysis.
             min_citations_m: The minimum number (M) of initial articles that must be cited by a DOI for forward analysis.
+            materialize: If True (default), backward/forward results are returned as lists. If False, they are
+                returned as lazy iterators so callers can stream them (e.g. straight into a CSV writer)
+                without holding every result record in memory.
+            raw_sink: If given, each initial DOI's raw record is passed to it as soon as it is fetched
+                instead of being collected, and the returned raw_data is empty.
 
         Returns:
             A tuple containing:
             - summary_data: List of dictionaries, one for each initial DOI processed.
-            - backward_results: List of dictionaries detailing novel backward papers and the initial DOIs referencing them.
-            - forward_results: List of dictionaries detailing novel forward papers and the initial DOIs they cite.
+            - backward_results: Dictionaries detailing novel backward papers and the initial DOIs referencing them.
+            - forward_results: Dictionaries detailing novel forward papers and the initial DOIs they cite.
             - raw_data: Dictionary mapping each initial DOI to its fetched references and citations.
         """
         do_backward = min_references_n > 0
@@ -105,125 +478,78 @@ class CocitationAnalyzer:
             return [], [], [], {}
 
         summary_data: List[SummaryRecord] = []
-        all_references: Dict[Doi, List[Doi]] = defaultdict(list)
-        all_citations: Dict[Doi, List[Doi]] = defaultdict(list)
+        # Per initial identifier, the de-duplicated fetched DOIs minus the initial set. They are
+        # counted in one pass after fetching and reused to emit edges for DOIs meeting the threshold.
+        # A direction that was not requested gets no container at all.
+        reference_candidates: Optional[Dict[Identifier, Set[Doi]]] = {} if do_backward else None
+        citation_candidates: Optional[Dict[Identifier, Set[Doi]]] = {} if do_forward else None
         raw_data: Dict[Identifier, RawDataRecord] = {}
         
-        processed_count = 0
-        total_initial = len(self.all_identifiers)
-        api_name = type(self.api_client).__name__
+        # Bind the append to a local once instead of re-resolving it per identifier
+        summary_append = summary_data.append
+        store_raw = raw_sink if raw_sink is not None else raw_data.__setitem__
 
         logger.info(f"Starting analysis pass (N={min_references_n}, M={min_citations_m})...")
 
-        for initial_identifier in self.all_identifiers:
-            processed_count += 1
-            id_type = "MAG ID" if initial_identifier.isdigit() else "DOI"
-            logger.info(f"Processing ({processed_count}/{total_initial}) {id_type}: {initial_identifier}")
-            
-            timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-            
-            fetched_references, fetched_citations, api_contributions = self._fetch_data_for_identifier(
-                initial_identifier, 
-                fetch_references=do_backward, 
-                fetch_citations=do_forward
-            )
+        fetched = self._iter_fetched(fetch_references=do_backward, fetch_citations=do_forward)
+
+        total_initial = len(self.all_identifiers)
+
+        for processed, (initial_identifier, (timestamp, fetched_references, fetched_citations, api_contributions)) in enumerate(fetched, 1):
 
-            # Store the raw fetched data (even if None)
-            raw_data[initial_identifier] = {
+            # Store (or hand off) the raw fetched data (even if None)
+            store_raw(initial_identifier, {
                 'references': fetched_references,
                 'citations': fetched_citations
-            }
+            })
 
-            ref_count = len(fetched_references) if fetched_references is not None else 0
-            cite_count = len(fetched_citations) if fetched_citations is not None else 0
+            summary_append(self._build_summary_record(initial_identifier, fetched_references, fetched_citations, api_contributions, timestamp))
+            self._aggregate(initial_identifier, fetched_references, fetched_citations, reference_candidates, citation_candidates)
 
-            # Add to summary
-            summary_record = {
-                'doi': initial_identifier,  # Keep 'doi' field name for compatibility, but it may contain MAG ID
-                'references_found': ref_count,
-                'citations_found': cite_count,
-                'api': api_name,
-                'retrieval_timestamp': timestamp
-            }
-            
-            # Add API contribution statistics if available
-            if api_contributions:
-                if 'references' in api_contributions:
-                    ref_stats = api_contributions['references']
-                    summary_record.update({
-                        'references_OpenAlex': ref_stats.get('OpenAlex', 0),
-                        'references_SemanticScholar': ref_stats.get('SemanticScholar', 0),
-                        'references_Overlap': ref_stats.get('Overlap', 0),
-                        'references_OpenAlex_unique': ref_stats.get('OpenAlex_unique', 0),
-                        'references_SemanticScholar_unique': ref_stats.get('SemanticScholar_unique', 0),
-                        'references_Total_unique': ref_stats.get('Total_unique', 0)
-                    })
-                if 'citations' in api_contributions:
-                    cite_stats = api_contributions['citations']
-                    summary_record.update({
-                        'citations_OpenAlex': cite_stats.get('OpenAlex', 0),
-                        'citations_SemanticScholar': cite_stats.get('SemanticScholar', 0),
-                        'citations_Overlap': cite_stats.get('Overlap', 0),
-                        'citations_OpenAlex_unique': cite_stats.get('OpenAlex_unique', 0),
-                        'citations_SemanticScholar_unique': cite_stats.get('SemanticScholar_unique', 0),
-                        'citations_Total_unique': cite_stats.get('Total_unique', 0)
-                    })
-            
-            summary_data.append(summary_record)
-
-            # Populate backward analysis data structures (using the fetched data)
-            if do_backward and fetched_references is not None:
-                unique_references = set(fetched_references)
-                for ref_doi in unique_references:
-                    if ref_doi not in self.all_identifiers:
-                        all_references[ref_doi].append(initial_identifier)
-
-            # Populate forward analysis data structures (using the fetched data)
-            if do_forward and fetched_citations is not None:
-                unique_citations = set(fetched_citations)
-                for cite_doi in unique_citations:
-                    if cite_doi not in self.all_identifiers:
-                         all_citations[cite_doi].append(initial_identifier)
+            # Drop candidates that can no longer reach their threshold with the identifiers still to come
+            remaining = total_initial - processed
+            if reference_candidates is not None:
+                self._prune_candidates(reference_candidates, min_references_n, remaining)
+            if citation_candidates is not None:
+                self._prune_candidates(citation_candidates, min_citations_m, remaining)
 
         # --- Post-processing ---
 
         # Backward Analysis Results Calculation
-        backward_results: List[ResultRecord] = []
+        backward_results: Iterable[ResultRecord] = ()
         if do_backward:
             logger.info(f"Calculating backward results (N={min_references_n})...")
-            for referenced_doi, citing_initial_dois in all_references.items():
-                if len(citing_initial_dois) >= min_references_n:
-                    logger.debug(f"Backward novel paper: {referenced_doi} (referenced by {len(citing_initial_dois)} initial DOIs)")
-                    for initial_doi in citing_initial_dois:
-                        backward_results.append({
-                            'novel_doi': referenced_doi,
-                            'initial_citing_doi': initial_doi
-                        })
-            logger.info(f"Backward analysis complete. Found {len(set(r['novel_doi'] for r in backward_results))} unique novel papers meeting threshold N={min_references_n}.")
+            reference_counts = self._count_candidates(reference_candidates)
+            novel_references = {doi for doi, n in reference_counts.items() if n >= min_references_n}
+            backward_results = self.iter_backward_results(self._collect_edges(reference_candidates, novel_references))
+            logger.info(f"Backward analysis complete. Found {len(novel_references)} unique novel papers meeting threshold N={min_references_n}.")
 
 
         # Forward Analysis Results Calculation
-        forward_results: List[ResultRecord] = []
+        forward_results: Iterable[ResultRecord] = ()
         if do_forward:
             logger.info(f"Calculating forward results (M={min_citations_m})...")
-            for citing_doi, cited_initial_dois in all_citations.items():
-                 if len(cited_initial_dois) >= min_citations_m:
-                    logger.debug(f"Forward novel paper: {citing_doi} (cites {len(cited_initial_dois)} initial DOIs)")
-                    for initial_doi in cited_initial_dois:
-                        forward_results.append({
-                            'novel_doi': citing_doi,
-                            'initial_cited_doi': initial_doi
-                        })
-            logger.info(f"Forward analysis complete. Found {len(set(r['novel_doi'] for r in forward_results))} unique novel papers meeting threshold M={min_citations_m}.")
+            citation_counts = self._count_candidates(citation_candidates)
+            novel_citations = {doi for doi, n in citation_counts.items() if n >= min_citations_m}
+            forward_results = self.iter_forward_results(self._collect_edges(citation_candidates, novel_citations))
+            logger.info(f"Forward analysis complete. Found {len(novel_citations)} unique novel papers meeting threshold M={min_citations_m}.")
+
+        if materialize:
+            backward_results = list(backward_results)
+            forward_results = list(forward_results)
 
         logger.info("Analysis pass complete.")
         # Return all collected data
         return summary_data, backward_results, forward_results, raw_data
 
-    def run_base_collection(self) -> Tuple[List[SummaryRecord], Dict[Identifier, RawDataRecord]]:
+    def run_base_collection(self, raw_sink: Optional[RawDataSink] = None) -> Tuple[List[SummaryRecord], Dict[Identifier, RawDataRecord]]:
         """
         Collects references and citations for all initial identifiers without performing co-citation analysis.
         
+        Args:
+            raw_sink: If given, each initial identifier's raw record is passed to it as soon as it is
+                fetched instead of being collected, and the returned raw_data is empty.
+
         Returns:
             A tuple containing:
             - summary_data: List of dictionaries, one for each initial identifier processed.
@@ -231,68 +557,21 @@ class CocitationAnalyzer:
         """
         summary_data: List[SummaryRecord] = []
         raw_data: Dict[Identifier, RawDataRecord] = {}
-        
-        processed_count = 0
-        total_initial = len(self.all_identifiers)
-        api_name = type(self.api_client).__name__
+        store_raw = raw_sink if raw_sink is not None else raw_data.__setitem__
 
         logger.info("Starting base data collection (no co-citation analysis)...")
 
-        for initial_identifier in self.all_identifiers:
-            processed_count += 1
-            id_type = "MAG ID" if initial_identifier.isdigit() else "DOI"
-            logger.info(f"Processing ({processed_count}/{total_initial}): {initial_identifier}")
-            
-            timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-            
-            fetched_references, fetched_citations, api_contributions = self._fetch_data_for_identifier(
-                initial_identifier, 
-                fetch_references=True, 
-                fetch_citations=True
-            )
+        fetched = self._iter_fetched(fetch_references=True, fetch_citations=True)
+
+        for initial_identifier, (timestamp, fetched_references, fetched_citations, api_contributions) in fetched:
 
-            # Store the raw fetched data (even if None)
-            raw_data[initial_identifier] = {
+            # Store (or hand off) the raw fetched data (even if None)
+            store_raw(initial_identifier, {
                 'references': fetched_references,
                 'citations': fetched_citations
-            }
+            })
 
-            ref_count = len(fetched_references) if fetched_references is not None else 0
-            cite_count = len(fetched_citations) if fetched_citations is not None else 0
-
-            # Add to summary
-            summary_record = {
-                'doi': initial_identifier,  # Keep 'doi' field name for compatibility, but it may contain MAG ID
-                'references_found': ref_count,
-                'citations_found': cite_count,
-                'api': api_name,
-                'retrieval_timestamp': timestamp
-            }
-            
-            # Add API contribution statistics if available
-            if api_contributions:
-                if 'references' in api_contributions:
-                    ref_stats = api_contributions['references']
-                    summary_record.update({
-                        'references_OpenAlex': ref_stats.get('OpenAlex', 0),
-                        'references_SemanticScholar': ref_stats.get('SemanticScholar', 0),
-                        'references_Overlap': ref_stats.get('Overlap', 0),
-                        'references_OpenAlex_unique': ref_stats.get('OpenAlex_unique', 0),
-                        'references_SemanticScholar_unique': ref_stats.get('SemanticScholar_unique', 0),
-                        'references_Total_unique': ref_stats.get('Total_unique', 0)
-                    })
-                if 'citations' in api_contributions:
-                    cite_stats = api_contributions['citations']
-                    summary_record.update({
-                        'citations_OpenAlex': cite_stats.get('OpenAlex', 0),
-                        'citations_SemanticScholar': cite_stats.get('SemanticScholar', 0),
-                        'citations_Overlap': cite_stats.get('Overlap', 0),
-                        'citations_OpenAlex_unique': cite_stats.get('OpenAlex_unique', 0),
-                        'citations_SemanticScholar_unique': cite_stats.get('SemanticScholar_unique', 0),
-                        'citations_Total_unique': cite_stats.get('Total_unique', 0)
-                    })
-            
-            summary_data.append(summary_record)
+            summary_data.append(self._build_summary_record(initial_identifier, fetched_references, fetched_citations, api_contributions, timestamp))
 
         logger.info("Base collection complete.")
         return summary_data, raw_data 
\ No newline at end of file
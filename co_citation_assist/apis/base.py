@@ -1,8 +1,35 @@
 # Base API definition
+import logging
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class NotFoundError(LookupError):
+    """Raised by a client when the API does not know the requested identifier (e.g. HTTP 404).
+
+    Distinct from network or server errors, which clients raise as FetchError.
+    """
+
+
+class FetchError(RuntimeError):
+    """Raised by a client when fetching fails (network errors, server errors after retries,
+    a failed page), so callers can tell a failure from a genuinely empty result and never
+    cache it as one.
+    """
+
+
+# Set (to 1) in the per-source statistics of a merged result when one of the sources failed:
+# the result is still usable, but incomplete, so it must not be cached
+INCOMPLETE_STAT = 'Incomplete'
+
 
 class CitationAPI(ABC):
+    # Number of identifiers the analyzer hands to one get_*_batch call. Clients that can
+    # answer several identifiers in a single request raise this; 1 keeps per-identifier fetches.
+    BATCH_SIZE = 1
+
     @abstractmethod
     def get_references(self, identifier: str) -> List[str]:
         """Fetch works referenced by the given identifier (e.g., DOI).
@@ -12,6 +39,10 @@ class CitationAPI(ABC):
             
         Returns:
             A list of DOIs referenced by the identifier
+
+        Raises:
+            NotFoundError: If the API does not know the identifier
+            FetchError: If fetching failed
         """
         pass
 
@@ -24,5 +55,69 @@ class CitationAPI(ABC):
             
         Returns:
             A list of DOIs citing the identifier
+
+        Raises:
+            NotFoundError: If the API does not know the identifier
+            FetchError: If fetching failed
         """
-        pass 
\ No newline at end of file
+        pass
+
+    def get_references_batch(self, identifiers: List[str]) -> Dict[str, Optional[List[str]]]:
+        """Fetch works referenced by each of the given identifiers.
+
+        The default implementation calls get_references once per identifier; clients whose
+        backend accepts several identifiers per request override it.
+
+        Args:
+            identifiers: DOI or MAG ID strings, at most BATCH_SIZE of them
+
+        Returns:
+            A dictionary mapping each identifier to the list of DOIs it references,
+            or to None if the API does not know the identifier; identifiers whose fetch failed are left out
+        """
+        results: Dict[str, Optional[List[str]]] = {}
+        for identifier in identifiers:
+            try:
+                results[identifier] = self.get_references(identifier)
+            except NotFoundError:
+                results[identifier] = None
+            except Exception as e:
+                # Keep the rest of the batch; the failing identifier is left out, so callers treat it
+                # like a failed per-identifier fetch and don't cache it as empty
+                logger.error(f"Error fetching references for {identifier} using {type(self).__name__}: {e}")
+        return results
+
+    def get_citations_batch(self, identifiers: List[str]) -> Dict[str, Optional[List[str]]]:
+        """Fetch works citing each of the given identifiers.
+
+        The default implementation calls get_citations once per identifier; clients whose
+        backend accepts several identifiers per request override it.
+
+        Args:
+            identifiers: DOI or MAG ID strings, at most BATCH_SIZE of them
+
+        Returns:
+            A dictionary mapping each identifier to the list of DOIs citing it,
+            or to None if the API does not know the identifier; identifiers whose fetch failed are left out
+        """
+        results: Dict[str, Optional[List[str]]] = {}
+        for identifier in identifiers:
+            try:
+                results[identifier] = self.get_citations(identifier)
+            except NotFoundError:
+                results[identifier] = None
+            except Exception as e:
+                # Keep the rest of the batch; the failing identifier is left out, so callers treat it
+                # like a failed per-identifier fetch and don't cache it as empty
+                logger.error(f"Error fetching citations for {identifier} using {type(self).__name__}: {e}")
+        return results
+
+    def close(self) -> None:
+        """Release pooled connections held by the client. Safe to call more than once."""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,14 +1,19 @@
 import logging
-from typing import List, Set, Dict, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Collection, List, Dict, Tuple, Optional, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
 import time
 
-from .base import CitationAPI
+from .base import INCOMPLETE_STAT, CitationAPI, FetchError, NotFoundError
 from .openalex import OpenAlexAPI  
 from .semantic_scholar import SemanticScholarAPI
+from ..cache import MISS, ResponseCache
 
 logger = logging.getLogger(__name__)
 
+# Stands in for the result of an API whose fetch failed, as opposed to an empty list or None (unknown)
+_FAILED = object()
+
 class CompositeAPI(CitationAPI):
     """
     Composite API that combines results from multiple citation APIs.
@@ -17,13 +22,38 @@ class CompositeAPI(CitationAPI):
     the results to provide the most comprehensive citation data possible.
     """
     
-    def __init__(self):
-        """Initialize the composite API with both underlying APIs."""
-        self.openalex = OpenAlexAPI()
-        self.semantic_scholar = SemanticScholarAPI()
+    # Batches are sized for OpenAlex, which answers a whole batch in a handful of requests
+    BATCH_SIZE = OpenAlexAPI.BATCH_SIZE
+    # Threads shared by all calls; two per concurrent caller (one per upstream API)
+    MAX_WORKERS = 16
+    # Merged results remembered per (method, identifier) for the lifetime of the client, so the
+    # same work looked up again (e.g. under another spelling of its DOI) costs no requests
+    MEMO_SIZE = 4096
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Initialize the composite API with both underlying APIs.
+
+        Args:
+            cache: Optional persistent cache passed to both underlying clients.
+        """
+        self.openalex = OpenAlexAPI(cache=cache)
+        self.semantic_scholar = SemanticScholarAPI(cache=cache)
+        # Created once and reused, instead of starting and joining two threads per identifier
+        self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="composite")
+        # (method, normalized identifier) -> (merged_dois, stats), or None if neither API knows it
+        self._memo: Dict[Tuple[str, str], Optional[Tuple[List[str], Dict[str, int]]]] = {}
+        self._memo_lock = threading.Lock()
         logger.info("Initialized Composite API with OpenAlex and Semantic Scholar")
     
-    def _fetch_from_api(self, api: CitationAPI, api_name: str, identifier: str, method: str) -> Tuple[str, List[str]]:
+    def close(self) -> None:
+        """Shut down the worker threads and close both underlying API clients."""
+        self._executor.shutdown(wait=True)
+        self._memo.clear()
+        self.openalex.close()
+        self.semantic_scholar.close()
+    
+    def _fetch_from_api(self, api: CitationAPI, api_name: str, identifier: str, method: str) -> Tuple[str, Optional[List[str]]]:
         """
         Fetch data from a specific API with error handling.
         
@@ -34,7 +64,8 @@ class CompositeAPI(CitationAPI):
             method: 'references' or 'citations'
             
         Returns:
-            Tuple of (api_name, list_of_dois)
+            Tuple of (api_name, list_of_dois); list_of_dois is None if the API does not know the identifier,
+            and _FAILED if fetching failed
         """
         try:
             start_time = time.time()
@@ -47,49 +78,113 @@ class CompositeAPI(CitationAPI):
             logger.debug(f"{api_name} returned {len(results)} {method} for {identifier} in {elapsed:.2f}s")
             return api_name, results
             
+        except NotFoundError:
+            logger.debug(f"[{api_name}] {identifier} not found")
+            return api_name, None
         except Exception as e:
             logger.error(f"[{api_name}] Error fetching {method} for {identifier}: {e}")
-            return api_name, []
+            return api_name, _FAILED
     
-    def _merge_results(self, openalex_results: List[str], semantic_scholar_results: List[str], 
-                      identifier: str, data_type: str) -> List[str]:
+    @staticmethod
+    def _memo_key(identifier: str, method: str) -> Tuple[str, str]:
+        """Memo key for an identifier: DOIs are case-insensitive and may carry a https://doi.org/ prefix."""
+        if identifier.startswith("https://doi.org/"):
+            identifier = identifier[len("https://doi.org/"):]
+        return method, identifier.lower()
+
+    def _remember(self, identifier: str, method: str, result: Optional[Tuple[List[str], Dict[str, int]]]) -> None:
+        """Store a merged result in the memo, evicting the oldest entry once MEMO_SIZE is reached."""
+        with self._memo_lock:
+            if len(self._memo) >= self.MEMO_SIZE:
+                del self._memo[next(iter(self._memo))]
+            self._memo[self._memo_key(identifier, method)] = result
+
+    @staticmethod
+    def _raise_if_not_found(results: Dict[str, Optional[List[str]]], identifier: str) -> None:
+        """Raise NotFoundError if every API reported the identifier as unknown."""
+        if results and all(dois is None for dois in results.values()):
+            raise NotFoundError(identifier)
+
+    @staticmethod
+    def _log_stats(identifier: str, method: str, stats: Dict[str, int]) -> None:
         """
-        Merge results from multiple APIs, removing duplicates and logging statistics.
-        
+        Log the per-API contribution statistics for one identifier and direction at DEBUG level;
+        they are also written to the summary output.
+        """
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        logger.debug(
+            f"{method.capitalize()} stats for {identifier}: "
+            f"OpenAlex={stats['OpenAlex']}, "
+            f"SemanticScholar={stats['SemanticScholar']}, "
+            f"Overlap={stats['Overlap']}, "
+            f"OpenAlex_unique={stats['OpenAlex_unique']}, "
+            f"SemanticScholar_unique={stats['SemanticScholar_unique']}, "
+            f"Total_unique={stats['Total_unique']}"
+        )
+
+    def _fetch_and_merge(self, identifier: str, method: str, with_stats: bool) -> Union[List[str], Tuple[List[str], Dict[str, int]]]:
+        """
+        Fetch one direction for an identifier from both APIs concurrently and merge the results.
+
         Args:
-            openalex_results: DOIs from OpenAlex
-            semantic_scholar_results: DOIs from Semantic Scholar  
-            identifier: Original DOI being processed
-            data_type: 'references' or 'citations' for logging
-            
+            identifier: A DOI or MAG ID string
+            method: 'references' or 'citations'
+            with_stats: Whether to return the contribution statistics along with the DOIs
+
         Returns:
-            Combined list of unique DOIs
+            The merged list of unique DOIs, or (merged_dois, statistics_dict) if with_stats is set
+
+        Raises:
+            NotFoundError: If neither API knows the identifier
+            FetchError: If both APIs failed
         """
-        # Convert to sets for deduplication
-        openalex_set = set(openalex_results) if openalex_results else set()
-        semantic_scholar_set = set(semantic_scholar_results) if semantic_scholar_results else set()
-        
-        # Calculate overlaps and unique contributions
-        overlap = openalex_set & semantic_scholar_set
-        openalex_unique = openalex_set - semantic_scholar_set
-        semantic_scholar_unique = semantic_scholar_set - openalex_set
-        
-        # Merge all results
-        merged = openalex_set | semantic_scholar_set
-        
-        # Log detailed statistics
-        logger.info(
-            f"Merged {data_type} for {identifier}: "
-            f"OpenAlex={len(openalex_set)}, "
-            f"SemanticScholar={len(semantic_scholar_set)}, "
-            f"Overlap={len(overlap)}, "
-            f"OpenAlex_unique={len(openalex_unique)}, "
-            f"SemanticScholar_unique={len(semantic_scholar_unique)}, "
-            f"Total_unique={len(merged)}"
-        )
-        
-        return list(merged)
-    
+        memoized = self._memo.get(self._memo_key(identifier, method), MISS)
+        if memoized is not MISS:
+            logger.debug(f"Using memoized {method} for: {identifier}")
+            if memoized is None:
+                raise NotFoundError(identifier)
+            return memoized if with_stats else memoized[0]
+
+        logger.debug(f"Fetching {method} from both APIs for: {identifier}")
+
+        # Fetch from both APIs concurrently
+        futures = [
+            self._executor.submit(self._fetch_from_api, self.openalex, "OpenAlex", identifier, method),
+            self._executor.submit(self._fetch_from_api, self.semantic_scholar, "SemanticScholar", identifier, method)
+        ]
+
+        # De-duplicate whichever result arrives first while the other API is still fetching
+        done, pending = wait(futures, return_when=FIRST_COMPLETED)
+        results: Dict[str, Optional[Collection[str]]] = {}
+        for future in done:
+            api_name, dois = future.result()
+            results[api_name] = set(dois) if dois and dois is not _FAILED and pending else dois
+        for future in pending:
+            api_name, dois = future.result()
+            results[api_name] = dois
+
+        try:
+            self._raise_if_not_found(results, identifier)
+        except NotFoundError:
+            self._remember(identifier, method, None)
+            raise
+
+        failed = [api_name for api_name, dois in results.items() if dois is _FAILED]
+        if len(failed) == len(results):
+            raise FetchError(f"{method} of {identifier}: all APIs failed")
+        for api_name in failed:
+            results[api_name] = []
+
+        merged, stats = self._merge_with_stats(results.get("OpenAlex", []), results.get("SemanticScholar", []))
+        self._log_stats(identifier, method, stats)
+        if failed:
+            # Usable, but missing one source: neither memoized nor cached, so a later run fetches it again
+            stats[INCOMPLETE_STAT] = 1
+        else:
+            self._remember(identifier, method, (merged, stats))
+        return (merged, stats) if with_stats else merged
+
     def get_references(self, identifier: str) -> List[str]:
         """
         Fetch references from both APIs and merge results.
@@ -100,25 +195,7 @@ class CompositeAPI(CitationAPI):
         Returns:
             A merged list of unique DOIs referenced by the given identifier
         """
-        logger.debug(f"Fetching references from both APIs for DOI: {identifier}")
-        
-        # Fetch from both APIs concurrently
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = {
-                executor.submit(self._fetch_from_api, self.openalex, "OpenAlex", identifier, "references"),
-                executor.submit(self._fetch_from_api, self.semantic_scholar, "SemanticScholar", identifier, "references")
-            }
-            
-            results = {}
-            for future in as_completed(futures):
-                api_name, dois = future.result()
-                results[api_name] = dois
-        
-        # Merge results
-        openalex_results = results.get("OpenAlex", [])
-        semantic_scholar_results = results.get("SemanticScholar", [])
-        
-        return self._merge_results(openalex_results, semantic_scholar_results, identifier, "references")
+        return self._fetch_and_merge(identifier, "references", with_stats=False)
     
     def get_citations(self, identifier: str) -> List[str]:
         """
@@ -130,25 +207,7 @@ class CompositeAPI(CitationAPI):
         Returns:
             A merged list of unique DOIs citing the given identifier
         """
-        logger.debug(f"Fetching citations from both APIs for DOI: {identifier}")
-        
-        # Fetch from both APIs concurrently
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = {
-                executor.submit(self._fetch_from_api, self.openalex, "OpenAlex", identifier, "citations"),
-                executor.submit(self._fetch_from_api, self.semantic_scholar, "SemanticScholar", identifier, "citations")
-            }
-            
-            results = {}
-            for future in as_completed(futures):
-                api_name, dois = future.result()
-                results[api_name] = dois
-        
-        # Merge results
-        openalex_results = results.get("OpenAlex", [])
-        semantic_scholar_results = results.get("SemanticScholar", [])
-        
-        return self._merge_results(openalex_results, semantic_scholar_results, identifier, "citations")
+        return self._fetch_and_merge(identifier, "citations", with_stats=False)
     
     def get_references_with_stats(self, identifier: str) -> Tuple[List[str], Dict[str, int]]:
         """
@@ -160,55 +219,7 @@ class CompositeAPI(CitationAPI):
         Returns:
             Tuple of (merged_dois, statistics_dict)
         """
-        logger.debug(f"Fetching references with stats from both APIs for DOI: {identifier}")
-        
-        # Fetch from both APIs concurrently
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = {
-                executor.submit(self._fetch_from_api, self.openalex, "OpenAlex", identifier, "references"),
-                executor.submit(self._fetch_from_api, self.semantic_scholar, "SemanticScholar", identifier, "references")
-            }
-            
-            results = {}
-            for future in as_completed(futures):
-                api_name, dois = future.result()
-                results[api_name] = dois
-        
-        # Get individual results
-        openalex_results = results.get("OpenAlex", [])
-        semantic_scholar_results = results.get("SemanticScholar", [])
-        
-        # Convert to sets for statistics calculation
-        openalex_set = set(openalex_results) if openalex_results else set()
-        semantic_scholar_set = set(semantic_scholar_results) if semantic_scholar_results else set()
-        
-        # Calculate statistics
-        overlap = openalex_set & semantic_scholar_set
-        openalex_unique = openalex_set - semantic_scholar_set
-        semantic_scholar_unique = semantic_scholar_set - openalex_set
-        merged = openalex_set | semantic_scholar_set
-        
-        stats = {
-            'OpenAlex': len(openalex_set),
-            'SemanticScholar': len(semantic_scholar_set),
-            'Overlap': len(overlap),
-            'OpenAlex_unique': len(openalex_unique),
-            'SemanticScholar_unique': len(semantic_scholar_unique),
-            'Total_unique': len(merged)
-        }
-        
-        # Log detailed statistics
-        logger.info(
-            f"References stats for {identifier}: "
-            f"OpenAlex={stats['OpenAlex']}, "
-            f"SemanticScholar={stats['SemanticScholar']}, "
-            f"Overlap={stats['Overlap']}, "
-            f"OpenAlex_unique={stats['OpenAlex_unique']}, "
-            f"SemanticScholar_unique={stats['SemanticScholar_unique']}, "
-            f"Total_unique={stats['Total_unique']}"
-        )
-        
-        return list(merged), stats
+        return self._fetch_and_merge(identifier, "references", with_stats=True)
     
     def get_citations_with_stats(self, identifier: str) -> Tuple[List[str], Dict[str, int]]:
         """
@@ -220,52 +231,125 @@ class CompositeAPI(CitationAPI):
         Returns:
             Tuple of (merged_dois, statistics_dict)
         """
-        logger.debug(f"Fetching citations with stats from both APIs for DOI: {identifier}")
-        
-        # Fetch from both APIs concurrently
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = {
-                executor.submit(self._fetch_from_api, self.openalex, "OpenAlex", identifier, "citations"),
-                executor.submit(self._fetch_from_api, self.semantic_scholar, "SemanticScholar", identifier, "citations")
+        return self._fetch_and_merge(identifier, "citations", with_stats=True)
+
+    def _fetch_batch_from_api(self, api: CitationAPI, api_name: str, identifiers: List[str], method: str) -> Dict[str, Optional[List[str]]]:
+        """
+        Batch counterpart of _fetch_from_api; identifiers the API failed to fetch are left out,
+        so an empty dict is returned if the whole batch fails.
+        """
+        try:
+            start_time = time.time()
+            results = getattr(api, f"get_{method}_batch")(identifiers)
+            elapsed = time.time() - start_time
+            logger.debug(f"{api_name} returned {method} for {len(identifiers)} identifiers in {elapsed:.2f}s")
+            return results
+        except Exception as e:
+            logger.error(f"[{api_name}] Error fetching {method} for batch of {len(identifiers)} identifiers: {e}")
+            return {}
+
+    @staticmethod
+    def _merge_with_stats(openalex_results: Collection[str], semantic_scholar_results: Collection[str]) -> Tuple[List[str], Dict[str, int]]:
+        """Merge two DOI lists (or already de-duplicated sets) and compute the per-API contribution statistics."""
+        if not openalex_results or not semantic_scholar_results:
+            # Only one API contributed (or neither): de-duplicate it in one pass, no set algebra needed
+            unique = list(dict.fromkeys(openalex_results or semantic_scholar_results or ()))
+            openalex_count = len(unique) if openalex_results else 0
+            semantic_scholar_count = len(unique) if semantic_scholar_results else 0
+            stats = {
+                'OpenAlex': openalex_count,
+                'SemanticScholar': semantic_scholar_count,
+                'Overlap': 0,
+                'OpenAlex_unique': openalex_count,
+                'SemanticScholar_unique': semantic_scholar_count,
+                'Total_unique': len(unique)
             }
-            
-            results = {}
-            for future in as_completed(futures):
-                api_name, dois = future.result()
-                results[api_name] = dois
-        
-        # Get individual results
-        openalex_results = results.get("OpenAlex", [])
-        semantic_scholar_results = results.get("SemanticScholar", [])
-        
-        # Convert to sets for statistics calculation
-        openalex_set = set(openalex_results) if openalex_results else set()
-        semantic_scholar_set = set(semantic_scholar_results) if semantic_scholar_results else set()
-        
-        # Calculate statistics
-        overlap = openalex_set & semantic_scholar_set
-        openalex_unique = openalex_set - semantic_scholar_set
-        semantic_scholar_unique = semantic_scholar_set - openalex_set
+            return unique, stats
+        openalex_set = openalex_results if isinstance(openalex_results, set) else set(openalex_results)
+        semantic_scholar_set = semantic_scholar_results if isinstance(semantic_scholar_results, set) else set(semantic_scholar_results)
         merged = openalex_set | semantic_scholar_set
-        
+        overlap_count = len(openalex_set) + len(semantic_scholar_set) - len(merged)
         stats = {
             'OpenAlex': len(openalex_set),
             'SemanticScholar': len(semantic_scholar_set),
-            'Overlap': len(overlap),
-            'OpenAlex_unique': len(openalex_unique),
-            'SemanticScholar_unique': len(semantic_scholar_unique),
+            'Overlap': overlap_count,
+            'OpenAlex_unique': len(openalex_set) - overlap_count,
+            'SemanticScholar_unique': len(semantic_scholar_set) - overlap_count,
             'Total_unique': len(merged)
         }
-        
-        # Log detailed statistics
-        logger.info(
-            f"Citations stats for {identifier}: "
-            f"OpenAlex={stats['OpenAlex']}, "
-            f"SemanticScholar={stats['SemanticScholar']}, "
-            f"Overlap={stats['Overlap']}, "
-            f"OpenAlex_unique={stats['OpenAlex_unique']}, "
-            f"SemanticScholar_unique={stats['SemanticScholar_unique']}, "
-            f"Total_unique={stats['Total_unique']}"
-        )
-        
-        return list(merged), stats
\ No newline at end of file
+        return list(merged), stats
+
+    def _batch_with_stats(self, identifiers: List[str], method: str) -> Dict[str, Optional[Tuple[List[str], Dict[str, int]]]]:
+        """
+        Fetch one direction for a batch from both APIs concurrently and merge per identifier.
+        Identifiers that both APIs report as unknown map to None; identifiers that both APIs failed to fetch
+        are left out, and those only one API fetched are marked INCOMPLETE_STAT. Memoized identifiers are not
+        requested again.
+        """
+        results = {}
+        pending = []
+        for identifier in identifiers:
+            memoized = self._memo.get(self._memo_key(identifier, method), MISS)
+            if memoized is MISS:
+                pending.append(identifier)
+            else:
+                results[identifier] = memoized
+        if not pending:
+            return results
+
+        logger.debug(f"Fetching {method} with stats from both APIs for {len(pending)} identifiers")
+
+        openalex_future = self._executor.submit(self._fetch_batch_from_api, self.openalex, "OpenAlex", pending, method)
+        semantic_scholar_future = self._executor.submit(self._fetch_batch_from_api, self.semantic_scholar, "SemanticScholar", pending, method)
+        openalex_results = openalex_future.result()
+        semantic_scholar_results = semantic_scholar_future.result()
+
+        for identifier in pending:
+            openalex_dois = openalex_results.get(identifier, _FAILED)
+            semantic_scholar_dois = semantic_scholar_results.get(identifier, _FAILED)
+            if openalex_dois is _FAILED and semantic_scholar_dois is _FAILED:
+                logger.debug(f"{identifier} failed with both APIs")
+                continue
+            if openalex_dois is None and semantic_scholar_dois is None:
+                logger.debug(f"{identifier} not found by either API")
+                results[identifier] = None
+                self._remember(identifier, method, None)
+                continue
+            incomplete = openalex_dois is _FAILED or semantic_scholar_dois is _FAILED
+            merged, stats = self._merge_with_stats(
+                [] if openalex_dois is _FAILED else openalex_dois,
+                [] if semantic_scholar_dois is _FAILED else semantic_scholar_dois,
+            )
+            self._log_stats(identifier, method, stats)
+            if incomplete:
+                stats[INCOMPLETE_STAT] = 1
+            else:
+                self._remember(identifier, method, (merged, stats))
+            results[identifier] = (merged, stats)
+        return {identifier: results[identifier] for identifier in identifiers if identifier in results}
+
+    def get_references_batch_with_stats(self, identifiers: List[str]) -> Dict[str, Optional[Tuple[List[str], Dict[str, int]]]]:
+        """
+        Fetch references for a batch of identifiers from both APIs, with per-identifier statistics.
+
+        Args:
+            identifiers: DOI or MAG ID strings, at most BATCH_SIZE of them
+
+        Returns:
+            Dictionary mapping each identifier to (merged_dois, statistics_dict), or to None
+            if neither API knows the identifier
+        """
+        return self._batch_with_stats(identifiers, "references")
+
+    def get_citations_batch_with_stats(self, identifiers: List[str]) -> Dict[str, Optional[Tuple[List[str], Dict[str, int]]]]:
+        """
+        Fetch citations for a batch of identifiers from both APIs, with per-identifier statistics.
+
+        Args:
+            identifiers: DOI or MAG ID strings, at most BATCH_SIZE of them
+
+        Returns:
+            Dictionary mapping each identifier to (merged_dois, statistics_dict), or to None
+            if neither API knows the identifier
+        """
+        return self._batch_with_stats(identifiers, "citations")
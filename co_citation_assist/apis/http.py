@@ -0,0 +1,97 @@
+"""
+HTTP session setup shared by the API clients.
+"""
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+from ..utils import loads_json
+
+# Transient failures worth retrying; 429 responses are retried after their Retry-After delay
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Compressed encodings urllib3 can decode here: gzip and deflate, plus br when brotli is installed
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+# Process-wide sessions by service name, see get_session()
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def default_retry(allowed_methods: Iterable[str] = ("GET",)) -> Retry:
+    """
+    Retry policy for idempotent requests: up to 5 attempts with exponential backoff.
+
+    Args:
+        allowed_methods: HTTP methods to retry; only add POST for sessions whose POSTs are
+            read-only queries (e.g. Semantic Scholar's /paper/batch).
+    """
+    return Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(allowed_methods),
+        respect_retry_after_header=True,
+    )
+
+
+def _fast_json_hook(response: requests.Response, *args, **kwargs) -> requests.Response:
+    """
+    Response hook making response.json() parse the raw body with loads_json (orjson when installed),
+    so libraries that call it themselves, like pyalex, get the faster parser too.
+    """
+    response.json = lambda **_: loads_json(response.content)
+    return response
+
+
+def create_session(pool_connections: int = 16, pool_maxsize: int = 64, retry: Optional[Retry] = None,
+                   pool_block: bool = False, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Create a requests session whose connections are kept alive and reused.
+
+    Args:
+        pool_connections: Number of per-host connection pools to cache.
+        pool_maxsize: Maximum number of keep-alive connections per host; should cover the
+            number of threads making requests concurrently.
+        retry: Retry policy for the adapter; defaults to default_retry().
+        pool_block: Make threads wait for a pooled connection when all are in use, instead of
+            opening extra connections that are discarded afterwards.
+        headers: Extra headers sent with every request.
+
+    Returns:
+        A session with the pooled adapter mounted for https:// URLs, which requests compressed
+        responses and decodes JSON with loads_json.
+    """
+    session = requests.Session()
+    # Ask for compressed bodies explicitly; paginated JSON shrinks several-fold on the wire
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    if headers:
+        session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry if retry is not None else default_retry(),
+        pool_block=pool_block,
+    )
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_fast_json_hook)
+    return session
+
+
+def get_session(name: str, **kwargs: Any) -> requests.Session:
+    """
+    Returns the process-wide session for a service, creating it with create_session(**kwargs)
+    on first use.
+
+    All clients talking to the same service share its connection pool, so creating another
+    client does not mean new TLS handshakes. `kwargs` only take effect when the session is created.
+    """
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _sessions[name] = create_session(**kwargs)
+        return session
@@ -1,27 +1,303 @@
+import functools
 import logging
-from typing import List
-import time
-import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 import pyalex
+import pyalex.api
+import requests
 from pyalex import Works
 
-from .base import CitationAPI
+from .base import CitationAPI, FetchError, NotFoundError
+from ..cache import MISS, NEGATIVE_TTL, ResponseCache
+from .http import get_session
+from .rate_limit import shared_limiter
 from ..utils import get_openalex_email
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# OpenAlex DOIs are https://doi.org/ URLs; captures the bare DOI, which must start with "10."
+_DOI_RE = re.compile(r"(?:https://doi\.org/)?(10\..*)", re.DOTALL)
+
+
+def _norm_doi(doi: str) -> Optional[str]:
+    """Return the bare, lower-cased form of a (possibly URL-prefixed) DOI, or None if it is not valid."""
+    match = _DOI_RE.match(doi)
+    return match.group(1).lower() if match else None
+
+
+@functools.lru_cache(maxsize=100_000)
+def _build_query_id(identifier: str) -> Tuple[str, str, str]:
+    """
+    Normalize an identifier argument once: strips a https://doi.org/ prefix and classifies it.
+
+    Returns:
+        A tuple of (cleaned identifier, pyalex lookup key such as ``doi:10.x/y`` or ``mag:123``,
+        id type label for log messages).
+    """
+    if identifier.startswith("https://doi.org/"):
+        identifier = identifier[len("https://doi.org/"):]
+    if identifier.isdigit():
+        return identifier, f"mag:{identifier}", "MAG ID"
+    return identifier, f"doi:{identifier}", "DOI"
+
 class OpenAlexAPI(CitationAPI):
     """Implementation of CitationAPI using the OpenAlex service via pyalex library."""
 
-    def __init__(self):
-        """Initialize the OpenAlex API client."""
+    # OpenAlex allows 10 requests per second in the polite pool
+    RATE_LIMIT = 10
+    # OpenAlex accepts up to 100 values in one OR filter (e.g. doi:a|b|...)
+    BATCH_SIZE = 100
+    # Largest page size OpenAlex serves for list queries
+    MAX_PER_PAGE = 200
+    # Results reachable with page= paging; deeper result sets need cursor paging
+    MAX_PAGED_RESULTS = 10000
+    # Keep-alive connections kept for api.openalex.org; sized for concurrent callers
+    POOL_MAXSIZE = 64
+    # Threads used to fetch independent id batches concurrently (paced by the rate limiter)
+    MAX_WORKERS = 8
+    # Fields requested in list queries; full work records are many times larger than what is read
+    DOI_FIELDS = ["id", "doi"]
+    CITING_FIELDS = ["id", "doi", "referenced_works"]
+    RESOLVE_FIELDS = ["id", "doi", "ids", "referenced_works"]
+    # Resolved works remembered per client (identifier -> work), most recently used first
+    RESOLVE_CACHE_SIZE = 4096
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Initialize the OpenAlex API client.
+
+        Args:
+            cache: Optional persistent cache for work lookups and unknown identifiers, so later
+                runs over the same identifiers skip those requests.
+        """
+        self.cache = cache
+        # Shared by all OpenAlexAPI instances in the process (e.g. standalone and inside CompositeAPI)
+        self._limiter = shared_limiter("openalex", self.RATE_LIMIT)
+        # The pooled session with retries shared by all OpenAlexAPI instances in the process; pyalex
+        # uses it too (see _shared_pyalex_session below)
+        self.session = get_session("openalex", pool_maxsize=self.POOL_MAXSIZE)
+        self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="openalex")
+        # get_references and get_citations both start by looking up the identifier's work; memoize
+        # it per client so fetching both directions (or retrying) costs one lookup instead of two
+        self._resolve_work = functools.lru_cache(maxsize=self.RESOLVE_CACHE_SIZE)(self._get_work)
+        # Identifiers OpenAlex answered 404 for; lru_cache does not remember exceptions, so without
+        # this a citations request after a failed references request would 404 again
+        self._missing_ids: Set[str] = set()
         # Set the email for the polite pool
         email = get_openalex_email()
         pyalex.config.email = email
         logger.info(f"Initialized OpenAlex API client with email: {email}")
 
+    def close(self) -> None:
+        """
+        Stop the worker threads. The shared HTTP session, which pyalex also uses, stays open for
+        other clients.
+        """
+        self._executor.shutdown(wait=True)
+        self._resolve_work.cache_clear()
+
+    @staticmethod
+    def _doi_from_work(work: Dict) -> Optional[str]:
+        """Return the bare, lower-cased DOI of an OpenAlex work, or None if it has no valid DOI."""
+        doi = work.get("doi") if work else None
+        return _norm_doi(doi) if doi else None
+
+    def _cached_work(self, query_identifier: str) -> Optional[Dict]:
+        """Returns the persisted lookup result for e.g. ``doi:10.x/y``, or None if not cached."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get((type(self).__name__, "work", query_identifier.lower()))
+        return None if cached is MISS else cached
+
+    def _store_work(self, query_identifier: str, work: Dict) -> Dict:
+        """Persists the RESOLVE_FIELDS of a looked-up work, and returns them."""
+        work = {field: work.get(field) for field in self.RESOLVE_FIELDS}
+        if self.cache is not None:
+            self.cache.set((type(self).__name__, "work", query_identifier.lower()), work)
+        return work
+
+    def _is_missing(self, identifier: str) -> bool:
+        """Returns True if OpenAlex already answered 404 for `identifier`, in this run or a cached one."""
+        if identifier in self._missing_ids:
+            return True
+        if self.cache is not None and self.cache.get((type(self).__name__, "missing", identifier)) is not MISS:
+            self._missing_ids.add(identifier)
+            return True
+        return False
+
+    def _get_work(self, query_identifier: str, identifier: str) -> Dict:
+        """
+        Fetch a single work (e.g. ``doi:10.x/y``), raising NotFoundError if OpenAlex answers 404.
+        Lookups and 404s are persisted when the client has a cache (404s for NEGATIVE_TTL).
+
+        Callers use the memoized self._resolve_work, which takes the same arguments.
+        """
+        if self._is_missing(identifier):
+            raise NotFoundError(identifier)
+        cached = self._cached_work(query_identifier)
+        if cached is not None:
+            return cached
+        try:
+            with self._limiter:
+                work = Works()[query_identifier]
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                self._missing_ids.add(identifier)
+                if self.cache is not None:
+                    self.cache.set((type(self).__name__, "missing", identifier), True, expire=NEGATIVE_TTL)
+                raise NotFoundError(identifier) from e
+            raise
+        return self._store_work(query_identifier, work)
+
+    def _fetch_dois_by_id(self, openalex_ids: List[str]) -> Dict[str, str]:
+        """
+        Fetch works by OpenAlex ID with one openalex_id:W1|W2|... request per BATCH_SIZE ids.
+
+        Batches are independent, so when there is more than one they are fetched concurrently
+        on the client's thread pool; the shared rate limiter still paces the requests.
+
+        Returns:
+            A dictionary mapping each OpenAlex work URL to its DOI, for works that have one.
+
+        Raises:
+            Exception: If a batch fails; a partial mapping would silently drop references.
+        """
+        batches = [openalex_ids[i:i+self.BATCH_SIZE] for i in range(0, len(openalex_ids), self.BATCH_SIZE)]
+        if len(batches) > 1:
+            batch_results = self._executor.map(self._fetch_id_batch, batches)
+        else:
+            batch_results = map(self._fetch_id_batch, batches)
+
+        dois: Dict[str, str] = {}
+        for refs_batch in batch_results:
+            for ref in refs_batch:
+                doi = self._doi_from_work(ref)
+                if doi:
+                    dois[ref["id"]] = doi
+        return dois
+
+    def _fetch_id_batch(self, batch: List[str]) -> List[Dict]:
+        """Fetch up to BATCH_SIZE works by OpenAlex ID."""
+        with self._limiter:
+            return Works().filter_or(openalex_id=batch).select(self.DOI_FIELDS).get(per_page=len(batch))
+
+    def _iter_pages(self, make_query: Callable[[], Works], total: int) -> Iterator[List[Dict]]:
+        """
+        Yield all result pages of a list query, MAX_PER_PAGE works per page, in order.
+
+        Up to MAX_PAGED_RESULTS results, pages are addressed by number, so they are all fetched
+        concurrently on the client's thread pool. Deeper result sets need cursor paging, where each
+        request depends on the previous one; there the next page is prefetched while the caller
+        processes the current one.
+
+        Args:
+            make_query: Returns a new, unpaginated query object each time it is called.
+            total: The query's result count.
+        """
+        if total <= self.MAX_PAGED_RESULTS:
+            n_pages = -(-total // self.MAX_PER_PAGE)
+
+            def fetch_page(page: int) -> List[Dict]:
+                with self._limiter:
+                    return make_query().get(per_page=self.MAX_PER_PAGE, page=page)
+
+            yield from self._executor.map(fetch_page, range(1, n_pages + 1))
+            return
+
+        pages = self._limiter.throttle(make_query().paginate(per_page=self.MAX_PER_PAGE, n_max=None))
+        pending = self._executor.submit(next, pages, None)
+        while True:
+            page = pending.result()
+            if page is None:
+                return
+            pending = self._executor.submit(next, pages, None)
+            yield page
+
+    def _filter_works(self, identifiers: List[str], fields: Optional[List[str]]) -> Iterator[Tuple[str, str, Dict]]:
+        """
+        Look up works by DOI and MAG ID with one OR-filtered request per BATCH_SIZE DOIs (and per
+        BATCH_SIZE MAG IDs), selecting only `fields` when given.
+
+        Yields:
+            (identifier, query identifier such as ``doi:10.x/y``, work) for each work found.
+            Identifiers OpenAlex does not know (or whose DOI it spells differently) are not yielded.
+        """
+        by_doi: Dict[str, str] = {}
+        by_mag: Dict[str, str] = {}
+        for identifier in identifiers:
+            cleaned, _, id_type = _build_query_id(identifier)
+            if id_type == "MAG ID":
+                by_mag[cleaned] = identifier
+            else:
+                by_doi[cleaned.lower()] = identifier
+
+        for lookup, filter_kwargs in ((by_doi, lambda values: {"doi": values}),
+                                      (by_mag, lambda values: {"ids": {"mag": values}})):
+            values = list(lookup)
+            for i in range(0, len(values), self.BATCH_SIZE):
+                chunk = values[i:i+self.BATCH_SIZE]
+                query = Works().filter_or(**filter_kwargs(chunk))
+                if fields:
+                    query = query.select(fields)
+                with self._limiter:
+                    works = query.get(per_page=len(chunk))
+                for work in works:
+                    if lookup is by_doi:
+                        key = self._doi_from_work(work)
+                    else:
+                        key = str((work.get("ids") or {}).get("mag") or "")
+                    identifier = lookup.get(key)
+                    if identifier is not None:
+                        yield identifier, f"{'doi' if lookup is by_doi else 'mag'}:{key}", work
+
+    def _resolve_works(self, identifiers: List[str]) -> Dict[str, Dict]:
+        """
+        Look up the OpenAlex works for several identifiers with one OR-filtered request per
+        BATCH_SIZE DOIs (and per BATCH_SIZE MAG IDs).
+
+        Identifiers whose lookup is persisted in the cache are served from it.
+
+        Returns:
+            A dictionary mapping each identifier that was found to its work. Identifiers
+            OpenAlex does not know (or whose DOI it spells differently) are left out.
+        """
+        resolved: Dict[str, Dict] = {}
+        uncached: List[str] = []
+        for identifier in identifiers:
+            cached = self._cached_work(_build_query_id(identifier)[1])
+            if cached is not None:
+                resolved[identifier] = cached
+            else:
+                uncached.append(identifier)
+
+        for identifier, query_identifier, work in self._filter_works(uncached, self.RESOLVE_FIELDS):
+            if identifier not in resolved:
+                resolved[identifier] = self._store_work(query_identifier, work)
+        logger.debug(f"[OpenAlex] Resolved {len(resolved)}/{len(identifiers)} identifiers in batch")
+        return resolved
+
+    def get_works(self, identifiers: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Fetch the OpenAlex works for several DOIs and/or MAG IDs, BATCH_SIZE per OR-filtered request.
+
+        Unlike the lookups behind get_references/get_citations, these works are not persisted in
+        the cache, since `fields` may ask for much more than the cache keeps.
+
+        Args:
+            identifiers: DOI or MAG ID strings
+            fields: Work fields to request (all fields if None)
+
+        Returns:
+            A dictionary mapping each identifier that was found to its work.
+        """
+        works: Dict[str, Dict] = {}
+        for identifier, _, work in self._filter_works(identifiers, fields):
+            works.setdefault(identifier, work)
+        return works
+
     def get_references(self, identifier: str) -> List[str]:
         """
         Fetch DOIs of works referenced by the given identifier (DOI or MAG ID).
@@ -33,208 +309,232 @@ class OpenAlexAPI(CitationAPI):
             
         Returns:
             A list of DOIs referenced by the given identifier
+
+        Raises:
+            NotFoundError: If OpenAlex has no work for the identifier
+            FetchError: If a request failed
         """
-        # Clean DOI if it's a URL
-        if identifier.startswith("https://doi.org/"):
-            identifier = identifier[len("https://doi.org/"):]
+        identifier, query_identifier, id_type = _build_query_id(identifier)
             
         try:
-            # Determine if this is a DOI or MAG ID and construct appropriate query
-            if identifier.isdigit():
-                # This is a MAG ID
-                query_identifier = f"mag:{identifier}"
-                logger.debug(f"Fetching work metadata for MAG ID: {identifier}")
-            else:
-                # This is a DOI
-                query_identifier = f"doi:{identifier}"
-                logger.debug(f"Fetching work metadata for DOI: {identifier}")
-            
-            work = Works()[query_identifier]
+            logger.debug(f"Fetching work metadata for {id_type}: {identifier}")
+            work = self._resolve_work(query_identifier, identifier)
             
             if not work or "referenced_works" not in work or not work["referenced_works"]:
-                id_type = "MAG ID" if identifier.isdigit() else "DOI"
                 logger.warning(f"[OpenAlex] No referenced works found for {id_type}: {identifier}")
                 return []
                 
             # Get referenced works IDs
             ref_ids = work["referenced_works"]
-            id_type = "MAG ID" if identifier.isdigit() else "DOI"
             logger.info(f"[OpenAlex] Found {len(ref_ids)} referenced works for {id_type}: {identifier}")
             
-            # Fetch the referenced works in batches to avoid overloading the API
-            # and extract DOIs
-            referenced_dois = []
-            batch_size = 25
-            
-            # Process in batches
-            for i in range(0, len(ref_ids), batch_size):
-                batch = ref_ids[i:i+batch_size]
-                
-                # Use pyalex to get details of referenced works
-                try:
-                    refs_batch = Works()[batch]
-                    
-                    # Extract DOIs from each work
-                    for ref in refs_batch:
-                        if ref and "doi" in ref and ref["doi"]:
-                            doi = ref["doi"]
-                            # Clean DOI if it's a URL
-                            if doi.startswith("https://doi.org/"):
-                                doi = doi[len("https://doi.org/"):]
-                            if doi.startswith('10.'):  # Basic validation
-                                referenced_dois.append(doi.lower())
+            # Fetch the referenced works BATCH_SIZE ids per request and extract DOIs
+            ref_dois = self._fetch_dois_by_id(ref_ids)
+            # Distinct works can share a DOI; keep each DOI once, in reference order
+            referenced_dois = list(dict.fromkeys(ref_dois[ref_id] for ref_id in ref_ids if ref_id in ref_dois))
                     
-                    # Add a small delay between batches
-                    if i + batch_size < len(ref_ids):
-                        time.sleep(0.5)
-                        
-                except Exception as e:
-                    logger.warning(f"Error fetching batch of references: {e}")
-                    continue
-                    
-            id_type = "MAG ID" if identifier.isdigit() else "DOI"
             logger.info(f"[OpenAlex] Successfully extracted {len(referenced_dois)} DOIs from referenced works for {id_type}: {identifier}")
             return referenced_dois
             
+        except NotFoundError:
+            raise
         except Exception as e:
-            id_type = "MAG ID" if identifier.isdigit() else "DOI"
             logger.error(f"Error fetching references for {id_type} {identifier}: {e}")
-            return []
+            raise FetchError(f"references of {id_type} {identifier}: {e}") from e
+
+    def iter_citations(self, identifier: str) -> Iterator[str]:
+        """
+        Yield DOIs of works citing the given identifier (DOI or MAG ID), page by page.
+
+        Each DOI is yielded once, as soon as the page containing it arrives, so callers can start
+        consuming citations while later pages are still being fetched.
+
+        Args:
+            identifier: A DOI string or MAG ID string
+
+        Raises:
+            NotFoundError: If OpenAlex has no work for the identifier
+        """
+        identifier, query_identifier, id_type = _build_query_id(identifier)
+        logger.debug(f"Fetching OpenAlex ID for {id_type}: {identifier}")
+
+        target_work = self._resolve_work(query_identifier, identifier)
+
+        if not target_work or "id" not in target_work:
+            logger.warning(f"[OpenAlex] Could not find OpenAlex ID for {id_type}: {identifier}")
+            return
+
+        openalex_id = target_work["id"]
+        if not openalex_id:
+            logger.warning(f"[OpenAlex] Found empty OpenAlex ID for {id_type}: {identifier}")
+            return
+
+        logger.debug(f"Found OpenAlex ID {openalex_id} for {id_type}: {identifier}")
+
+        # Create filter query using the OpenAlex ID (a fresh query object per request, since
+        # pages may be fetched concurrently)
+        def citing_works_query() -> Works:
+            return Works().filter(cites=openalex_id).select(self.DOI_FIELDS)
+
+        # Get citation count to log progress and to plan the pages
+        with self._limiter:
+            citation_count = citing_works_query().count()
+        logger.info(f"[OpenAlex] Found {citation_count} citing works for {id_type}: {identifier} (OpenAlex ID: {openalex_id})")
+
+        if citation_count == 0:
+            return
+
+        # OpenAlex can hold duplicate records of one work; yield each DOI once
+        seen = set()
+        # Bound to locals: this loop runs once per citing work
+        seen_add = seen.add
+        norm_doi = _norm_doi
+        # Fetch all result pages (concurrently where OpenAlex allows page= paging)
+        for page in self._iter_pages(citing_works_query, citation_count):
+            for work in page:
+                doi = work.get("doi")
+                if doi:
+                    doi = norm_doi(doi)
+                    if doi and doi not in seen:
+                        seen_add(doi)
+                        yield doi
 
     def get_citations(self, identifier: str) -> List[str]:
         """
         Fetch DOIs of works citing the given identifier (DOI or MAG ID).
         
         Uses pyalex to fetch the incoming citations (works that cite this paper).
+        See iter_citations for a streaming variant.
         
         Args:
             identifier: A DOI string or MAG ID string
             
         Returns:
             A list of DOIs citing the given identifier
+
+        Raises:
+            NotFoundError: If OpenAlex has no work for the identifier
+            FetchError: If a request (e.g. one of the result pages) failed
         """
-        # Clean DOI if it's a URL
-        if identifier.startswith("https://doi.org/"):
-            identifier = identifier[len("https://doi.org/"):]
+        identifier, _, id_type = _build_query_id(identifier)
             
         try:
-            # Determine if this is a DOI or MAG ID and construct appropriate query
-            if identifier.isdigit():
-                # This is a MAG ID
-                query_identifier = f"mag:{identifier}"
-                id_type = "MAG ID"
-                logger.debug(f"Fetching OpenAlex ID for MAG ID: {identifier}")
-            else:
-                # This is a DOI
-                query_identifier = f"doi:{identifier}"
-                id_type = "DOI"
-                logger.debug(f"Fetching OpenAlex ID for DOI: {identifier}")
-            
-            target_work = Works()[query_identifier]
+            citing_dois = list(self.iter_citations(identifier))
+            logger.info(f"[OpenAlex] Successfully extracted {len(citing_dois)} DOIs from citing works for {id_type}: {identifier}")
+            return citing_dois
 
-            if not target_work or "id" not in target_work:
-                logger.warning(f"[OpenAlex] Could not find OpenAlex ID for {id_type}: {identifier}")
-                return []
+        except NotFoundError:
+            raise
+        except Exception as e:
+            # Transient errors (429, 5xx) are already retried per request by the session's adapter
+            logger.error(f"[OpenAlex] Error fetching citations for {id_type} {identifier}: {e}")
+            raise FetchError(f"citations of {id_type} {identifier}: {e}") from e
 
-            openalex_id = target_work["id"]
-            if not openalex_id:
-                logger.warning(f"[OpenAlex] Found empty OpenAlex ID for {id_type}: {identifier}")
-                return []
-                
-            logger.debug(f"Found OpenAlex ID {openalex_id} for {id_type}: {identifier}")
+    def get_references_batch(self, identifiers: List[str]) -> Dict[str, Optional[List[str]]]:
+        """
+        Fetch DOIs of works referenced by each of the given identifiers.
 
-            # Use Works().filter(cites=openalex_id) to find works citing this work
-            logger.debug(f"Fetching citations for OpenAlex ID: {openalex_id}")
+        The initial works are resolved with one OR-filtered request, and the referenced works of
+        the whole batch are de-duplicated and fetched BATCH_SIZE ids per request, instead of a
+        lookup plus several reference requests per identifier. Identifiers that cannot be resolved
+        in batch fall back to get_references.
 
-            # Create filter query using the OpenAlex ID
-            citing_works_query = Works().filter(cites=openalex_id)
+        Args:
+            identifiers: DOI or MAG ID strings, at most BATCH_SIZE of them
 
-            # Get citation count to log progress
-            citation_count = citing_works_query.count()
-            logger.info(f"[OpenAlex] Found {citation_count} citing works for {id_type}: {identifier} (OpenAlex ID: {openalex_id})")
+        Returns:
+            A dictionary mapping each identifier to the list of DOIs it references,
+            or to None if OpenAlex does not know the identifier. Identifiers whose fetch
+            failed are left out.
+        """
+        try:
+            works = self._resolve_works(identifiers)
+            # Each referenced work is fetched once even if several initial works cite it
+            all_ref_ids = list(dict.fromkeys(
+                ref_id for work in works.values() for ref_id in work.get("referenced_works") or ()
+            ))
+            ref_dois = self._fetch_dois_by_id(all_ref_ids)
+        except Exception as e:
+            logger.warning(f"[OpenAlex] Batch lookup failed, fetching references one by one: {e}")
+            return super().get_references_batch(identifiers)
 
-            if citation_count == 0:
-                return []
+        results: Dict[str, Optional[List[str]]] = {}
+        for identifier in identifiers:
+            work = works.get(identifier)
+            if work is None:
+                fallback = super().get_references_batch([identifier])
+                if identifier in fallback:
+                    results[identifier] = fallback[identifier]
+                continue
+            results[identifier] = list(dict.fromkeys(ref_dois[ref_id] for ref_id in work.get("referenced_works") or () if ref_id in ref_dois))
+            logger.debug(f"[OpenAlex] Successfully extracted {len(results[identifier])} DOIs from referenced works for {identifier}")
+        return results
 
-            # Collect all citing DOIs with pagination to handle large result sets
-            citing_dois = []
-
-            # Use pagination to fetch all results
-            # pyalex handles this elegantly with an iterator
-            page_count = 0
-            for page in citing_works_query.paginate(per_page=100):
-                page_count += 1
-                for work in page:
-                    if "doi" in work and work["doi"]:
-                        doi = work["doi"]
-                        # Clean DOI if it's a URL
-                        if doi.startswith("https://doi.org/"):
-                            doi = doi[len("https://doi.org/"):]
-                        if doi.startswith('10.'):  # Basic validation
-                            citing_dois.append(doi.lower())
-                
-                # Add delay between pages to avoid rate limiting
-                time.sleep(0.5)
+    def get_citations_batch(self, identifiers: List[str]) -> Dict[str, Optional[List[str]]]:
+        """
+        Fetch DOIs of works citing each of the given identifiers.
 
-            logger.info(f"[OpenAlex] Successfully extracted {len(citing_dois)} DOIs from citing works for {id_type}: {identifier}")
-            return citing_dois
+        Runs a single paginated cites:W1|W2|... query for the whole batch and attributes each
+        citing work to the initial works it references. Identifiers that cannot be resolved in
+        batch fall back to get_citations.
 
-        except Exception as e:
-            # Check if this is a rate limiting error that we should retry
-            if "429" in str(e) or "too many" in str(e).lower():
-                id_type = "MAG ID" if identifier.isdigit() else "DOI"
-                logger.warning(f"[OpenAlex] Rate limited for {id_type} {identifier}, retrying with exponential backoff...")
-                
-                # Retry with exponential backoff
-                for attempt in range(3):
-                    delay = (2 ** attempt) + random.uniform(0, 1)  # 1-2s, 2-3s, 4-5s
-                    logger.info(f"[OpenAlex] Waiting {delay:.1f}s before retry attempt {attempt + 1}/3")
-                    time.sleep(delay)
-                    
-                    try:
-                        # Retry the entire citations fetch
-                        query_identifier = f"mag:{identifier}" if identifier.isdigit() else f"doi:{identifier}"
-                        target_work = Works()[query_identifier]
-                        if not target_work or "id" not in target_work:
+        Args:
+            identifiers: DOI or MAG ID strings, at most BATCH_SIZE of them
+
+        Returns:
+            A dictionary mapping each identifier to the list of DOIs citing it,
+            or to None if OpenAlex does not know the identifier. Identifiers whose fetch
+            failed are left out.
+        """
+        try:
+            works = self._resolve_works(identifiers)
+            # Map OpenAlex work URL -> initial identifier
+            by_openalex_id = {work["id"]: identifier for identifier, work in works.items() if work.get("id")}
+            # Ordered set of citing DOIs per identifier
+            citing: Dict[str, Dict[str, None]] = {identifier: {} for identifier in by_openalex_id.values()}
+
+            if by_openalex_id:
+                short_ids = [openalex_id.rsplit("/", 1)[-1] for openalex_id in by_openalex_id]
+
+                def citing_works_query() -> Works:
+                    return Works().filter_or(cites=short_ids).select(self.CITING_FIELDS)
+
+                with self._limiter:
+                    citation_count = citing_works_query().count()
+                # Bound to locals: this loop runs once per citing work and referenced work
+                norm_doi = _norm_doi
+                identifier_for = by_openalex_id.get
+                for page in self._iter_pages(citing_works_query, citation_count):
+                    for work in page:
+                        doi = work.get("doi")
+                        doi = norm_doi(doi) if doi else None
+                        if not doi:
                             continue
-                        
-                        openalex_id = target_work["id"]
-                        citing_works_query = Works().filter(cites=openalex_id)
-                        citation_count = citing_works_query.count()
-                        
-                        if citation_count == 0:
-                            return []
-                        
-                        citing_dois = []
-                        for page in citing_works_query.paginate(per_page=100):
-                            for work in page:
-                                if "doi" in work and work["doi"]:
-                                    doi = work["doi"]
-                                    if doi.startswith("https://doi.org/"):
-                                        doi = doi[len("https://doi.org/"):]
-                                    if doi.startswith('10.'):
-                                        citing_dois.append(doi.lower())
-                            # Longer delay during retry
-                            time.sleep(1.0)
-                        
-                        id_type = "MAG ID" if identifier.isdigit() else "DOI"
-                        logger.info(f"[OpenAlex] Successfully extracted {len(citing_dois)} DOIs from citing works for {id_type}: {identifier} (retry successful)")
-                        return citing_dois
-                        
-                    except Exception as retry_e:
-                        id_type = "MAG ID" if identifier.isdigit() else "DOI"
-                        if attempt == 2:  # Last attempt
-                            logger.error(f"[OpenAlex] All retry attempts failed for {id_type} {identifier}: {retry_e}")
-                        else:
-                            logger.warning(f"[OpenAlex] Retry attempt {attempt + 1} failed for {id_type} {identifier}: {retry_e}")
-                        continue
-                
-                return []  # All retries failed
-            
-            # More specific error for the initial ID lookup vs. fetching citations
-            id_type = "MAG ID" if identifier.isdigit() else "DOI"
-            if 'openalex_id' not in locals():
-                 logger.error(f"[OpenAlex] Error fetching OpenAlex ID for {id_type} {identifier}: {e}")
+                        for ref_id in work.get("referenced_works") or ():
+                            identifier = identifier_for(ref_id)
+                            if identifier is not None:
+                                citing[identifier][doi] = None
+            results: Dict[str, Optional[List[str]]] = {identifier: list(dois) for identifier, dois in citing.items()}
+        except Exception as e:
+            logger.warning(f"[OpenAlex] Batch citation query failed, fetching citations one by one: {e}")
+            return super().get_citations_batch(identifiers)
+
+        for identifier in identifiers:
+            if identifier not in results:
+                results.update(super().get_citations_batch([identifier]))
             else:
-                logger.error(f"[OpenAlex] Error fetching citations for {id_type} {identifier} (OpenAlex ID: {openalex_id}): {e}")
-            return [] 
\ No newline at end of file
+                logger.debug(f"[OpenAlex] Successfully extracted {len(results[identifier])} DOIs from citing works for {identifier}")
+        return results
+
+
+def _shared_pyalex_session() -> requests.Session:
+    """Returns the process-wide OpenAlex session, for pyalex's own requests."""
+    return get_session("openalex", pool_maxsize=OpenAlexAPI.POOL_MAXSIZE)
+
+
+# pyalex creates a new Session, and so a new TLS connection, for every request and every
+# paginator. Route them all through the shared pooled session with retries instead. Installed
+# once for the process rather than per client, so overlapping clients (e.g. a standalone one and
+# one inside CompositeAPI) never swap it under each other; the session itself is never closed.
+if hasattr(pyalex.api, "_get_requests_session"):
+    pyalex.api._get_requests_session = _shared_pyalex_session
@@ -0,0 +1,82 @@
+"""
+Client-side rate limiting for the citation API clients.
+"""
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Process-wide limiters by service name, see shared_limiter()
+_shared_limiters: Dict[str, "RateLimiter"] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+
+    Up to `burst` calls go through immediately; after that, callers are paced to
+    `rate` calls per second. Unlike a fixed sleep after every request, no time is
+    spent idle while the bucket still has tokens.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate: Sustained number of calls allowed per second.
+            burst: Maximum number of calls allowed back-to-back; defaults to one second's worth.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blocks until a call is allowed, then consumes one token."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def throttle(self, iterable: Iterable[T]) -> Iterator[T]:
+        """Yields from `iterable`, acquiring a token before each item is pulled (e.g. one per fetched page)."""
+        iterator = iter(iterable)
+        while True:
+            self.acquire()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            yield item
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def shared_limiter(name: str, rate: float, burst: Optional[int] = None) -> RateLimiter:
+    """
+    Returns the process-wide limiter for a service, creating it on first use.
+
+    The service's rate limit applies to the whole process (per email or IP), so every client
+    instance talking to it should draw from the same bucket. `rate` and `burst` only take
+    effect when the limiter is created.
+    """
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(name)
+        if limiter is None:
+            limiter = _shared_limiters[name] = RateLimiter(rate, burst)
+        return limiter
@@ -1,28 +1,91 @@
+import functools
 import logging
 import requests
-import time
-from typing import List, Optional, Dict, Any
-from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote, urlencode
 
-from .base import CitationAPI
-from ..utils import get_semantic_scholar_api_key
+from .base import CitationAPI, FetchError, NotFoundError
+from ..cache import MISS, NEGATIVE_TTL, ResponseCache
+from .http import default_retry, get_session
+from .rate_limit import shared_limiter
+from ..utils import get_semantic_scholar_api_key, loads_json
 
 logger = logging.getLogger(__name__)
 
+
+@functools.lru_cache(maxsize=100_000)
+def _paper_path(identifier: str) -> Tuple[str, str]:
+    """
+    Build the URL-encoded paper path for an identifier once: strips a https://doi.org/ prefix,
+    classifies it and percent-encodes DOIs, whose characters like '#', '?' or ';' would
+    otherwise end or change the URL path.
+
+    Returns:
+        A tuple of (path such as ``paper/10.x%3By`` or ``paper/MAG:123``, id type label for log messages).
+    """
+    if identifier.startswith("https://doi.org/"):
+        identifier = identifier[len("https://doi.org/"):]
+    if identifier.isdigit():
+        return f"paper/MAG:{identifier}", "MAG ID"
+    # Slashes stay literal: Semantic Scholar expects the DOI prefix/suffix separator as is
+    return f"paper/{quote(identifier, safe='/')}", "DOI"
+
 class SemanticScholarAPI(CitationAPI):
     """Implementation of CitationAPI using the Semantic Scholar Academic Graph API."""
     
     BASE_URL = "https://api.semanticscholar.org/graph/v1"
+    # Keep-alive connections kept per host; sized for concurrent callers sharing this client
+    # (CompositeAPI workers plus this client's citation page workers)
+    POOL_MAXSIZE = 20
+    # Unauthenticated clients are limited to roughly one request per second
+    RATE_LIMIT = 1
+    # Only externalIds.DOI is read from linked papers; other fields would just add payload
+    FIELDS = 'externalIds'
+    # /paper/batch accepts up to 500 ids per request
+    BATCH_SIZE = 500
+    # Maximum page size of the references/citations endpoints
+    PAGE_LIMIT = 1000
+    # The citations endpoint only pages through the first 10,000 entries (offset + limit <= 10,000)
+    MAX_OFFSET = 10000
+    # Citation pages requested concurrently; the rate limiter still paces them, but their
+    # round trips overlap instead of adding up
+    MAX_WORKERS = 4
     
-    def __init__(self):
-        """Initialize the Semantic Scholar API client."""
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Initialize the Semantic Scholar API client.
+
+        Args:
+            cache: Optional persistent cache; responses carrying an ETag are stored in it and
+                revalidated with If-None-Match, so unchanged pages come back as empty 304s.
+        """
+        self.cache = cache
+        # Validators outlive the result cache entries they back, so expired results can still be revalidated
+        self._etag_ttl = cache.ttl * 2 if cache is not None and cache.ttl is not None else None
         self.api_key = get_semantic_scholar_api_key()
-        self.session = requests.Session()
-        
-        # Set up headers
-        self.session.headers.update({
-            'User-Agent': 'co-citation-assist/0.1.0 (https://github.com/andreifoldes/co-citation-assist)'
-        })
+        # The limit applies per IP, so all SemanticScholarAPI instances in the process share one bucket
+        self._limiter = shared_limiter("semanticscholar", self.RATE_LIMIT)
+        # Reuse warm connections across all requests instead of reconnecting per call. With
+        # pool_block, threads beyond POOL_MAXSIZE wait for a pooled connection instead of opening
+        # a throwaway one (new TLS handshake) that is discarded when the pool is full. 429 and 5xx
+        # responses are retried by the adapter, honouring Retry-After; that includes the POSTs to
+        # /paper/batch, which only query, so a throttled batch is retried instead of falling back
+        # to one request per identifier.
+        # The session is shared by all SemanticScholarAPI instances in the process.
+        self.session = get_session(
+            "semanticscholar",
+            pool_connections=1,
+            pool_maxsize=self.POOL_MAXSIZE,
+            pool_block=True,
+            retry=default_retry(allowed_methods=("GET", "POST")),
+            headers={'User-Agent': 'co-citation-assist/0.1.0 (https://github.com/andreifoldes/co-citation-assist)'},
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="semanticscholar")
+        # Paper paths answered with 404 or with publisher-blocked (null) references in this run;
+        # also persisted to the cache for NEGATIVE_TTL if one is set
+        self._missing_paths: Set[str] = set()
+        self._blocked_paths: Set[str] = set()
         
         # Comment out API key usage temporarily due to 403 errors
         # The API works without the key but with rate limits
@@ -34,37 +97,70 @@ class SemanticScholarAPI(CitationAPI):
         # else:
         logger.info("Initialized Semantic Scholar API client without API key (rate limited)")
     
-    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict[str, Any]]:
-        """Make a request to the Semantic Scholar API with error handling and rate limiting."""
+    def close(self) -> None:
+        """Stop the worker threads. The shared HTTP session stays open for other clients."""
+        self._executor.shutdown(wait=True)
+    
+    def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Make a request to the Semantic Scholar API with error handling and rate limiting.
+
+        Raises:
+            NotFoundError: If the API answers 404 (unknown paper)
+            FetchError: If the request fails, after the session's retries
+        """
         url = f"{self.BASE_URL}/{endpoint}"
+        cache_key = (type(self).__name__, 'etag', endpoint, urlencode(sorted((params or {}).items())))
+        cached = self.cache.get(cache_key) if self.cache is not None else MISS
+        headers = {'If-None-Match': cached['etag']} if cached is not MISS else None
         
         try:
-            response = self.session.get(url, params=params, timeout=30)
-            
-            # Handle rate limiting
-            if response.status_code == 429:
-                retry_after = int(response.headers.get('Retry-After', 60))
-                logger.warning(f"Rate limited. Waiting {retry_after} seconds...")
-                time.sleep(retry_after)
-                # Retry once
-                response = self.session.get(url, params=params, timeout=30)
+            with self._limiter:
+                response = self.session.get(url, params=params, headers=headers, timeout=30)
             
-            if response.status_code == 200:
-                return response.json()
+            if response.status_code == 304 and cached is not MISS:
+                logger.debug(f"[SemanticScholar] Not modified: {endpoint}")
+                return cached['body']
+            elif response.status_code == 200:
+                data = loads_json(response.content)
+                etag = response.headers.get('ETag')
+                if self.cache is not None and etag:
+                    self.cache.set(cache_key, {'etag': etag, 'body': data}, expire=self._etag_ttl)
+                return data
             elif response.status_code == 404:
                 logger.debug(f"[SemanticScholar] Paper not found: {endpoint}")
-                return None
+                raise NotFoundError(endpoint)
             else:
                 logger.warning(f"[SemanticScholar] API request failed with status {response.status_code}: {response.text}")
-                return None
+                raise FetchError(f"{endpoint}: HTTP {response.status_code}")
                 
+        except (NotFoundError, FetchError):
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed for {endpoint}: {e}")
-            return None
+            raise FetchError(f"{endpoint}: {e}") from e
         except Exception as e:
             logger.error(f"Unexpected error for {endpoint}: {e}")
-            return None
+            raise FetchError(f"{endpoint}: {e}") from e
     
+    def _is_negative(self, kind: str, path: str, seen: Set[str]) -> bool:
+        """Returns True if `path` was recorded as `kind` ('missing' or 'blocked') in this run or a cached one."""
+        if path in seen:
+            return True
+        if self.cache is not None and self.cache.get((type(self).__name__, kind, path)) is not MISS:
+            seen.add(path)
+            return True
+        return False
+
+    def _remember_negative(self, kind: str, path: str, seen: Set[str]) -> None:
+        """
+        Records that `path` is unknown ('missing') or has publisher-blocked references ('blocked'),
+        so it is not requested again in this run, nor in later runs until NEGATIVE_TTL passes.
+        """
+        seen.add(path)
+        if self.cache is not None:
+            self.cache.set((type(self).__name__, kind, path), True, expire=NEGATIVE_TTL)
+
     def _extract_doi_from_paper(self, paper: Dict[str, Any]) -> Optional[str]:
         """Extract and validate DOI from a Semantic Scholar paper object."""
         doi = paper.get('doi')
@@ -72,6 +168,43 @@ class SemanticScholarAPI(CitationAPI):
             return doi.lower()
         return None
     
+    def _iter_citation_pages(self, fetch_page: Callable[[int], List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield citation pages in offset order until the caller stops iterating or MAX_OFFSET is reached.
+
+        The first page is fetched alone, since most papers fit in one. After that, MAX_WORKERS
+        pages are requested concurrently at a time, so their round trips overlap; once the caller
+        sees a short or empty page it stops, and at most one wave of requests is wasted.
+        A page that fails raises from fetch_page, so it is never mistaken for the end.
+        """
+        yield fetch_page(0)
+        wave = self.MAX_WORKERS * self.PAGE_LIMIT
+        last_offset = self.MAX_OFFSET - self.PAGE_LIMIT
+        offset = self.PAGE_LIMIT
+        while offset <= last_offset:
+            yield from self._executor.map(fetch_page, range(offset, min(offset + wave, last_offset + 1), self.PAGE_LIMIT))
+            offset += wave
+
+    @staticmethod
+    def _iter_dois(entries: Iterable[Dict[str, Any]], paper_key: Optional[str]) -> Iterator[str]:
+        """
+        Yield the valid, lower-cased DOIs of the linked papers in one page of references or citations.
+        Duplicates are passed through; callers de-duplicate with dict.fromkeys to keep the order.
+
+        Args:
+            entries: The page's 'data' list.
+            paper_key: 'citedPaper' for references, 'citingPaper' for citations, or None if the
+                entries are the papers themselves (as embedded in /paper/batch results).
+        """
+        for entry in entries:
+            # Extract DOI from externalIds; each level may be missing or null
+            paper = entry.get(paper_key) if paper_key else entry
+            external_ids = paper.get('externalIds') if paper else None
+            doi = external_ids.get('DOI') if external_ids else None
+            # The isinstance check also rules out None; '' fails the prefix check
+            if isinstance(doi, str) and doi.startswith('10.') and '/' in doi:
+                yield doi.lower()
+    
     def get_references(self, identifier: str) -> List[str]:
         """
         Fetch DOIs of works referenced by the given identifier (DOI or MAG ID).
@@ -80,24 +213,23 @@ class SemanticScholarAPI(CitationAPI):
             identifier: A DOI string or MAG ID string
             
         Returns:
-            A list of DOIs referenced by the given identifier
+            A list of unique DOIs referenced by the given identifier
+
+        Raises:
+            NotFoundError: If Semantic Scholar does not know the identifier
+            FetchError: If the request failed
         """
-        # Clean DOI if it's a URL
-        if identifier.startswith("https://doi.org/"):
-            identifier = identifier[len("https://doi.org/"):]
-        
-        # Determine if this is a DOI or MAG ID and construct appropriate endpoint
-        if identifier.isdigit():
-            # This is a MAG ID
-            endpoint = f"paper/MAG:{identifier}/references"
-            id_type = "MAG ID"
-        else:
-            # This is a DOI
-            endpoint = f"paper/{identifier}/references"
-            id_type = "DOI"
+        path, id_type = _paper_path(identifier)
+        endpoint = f"{path}/references"
+        if self._is_negative('missing', path, self._missing_paths):
+            logger.debug(f"[SemanticScholar] Skipping {id_type} {identifier}: previously not found")
+            raise NotFoundError(identifier)
+        if self._is_negative('blocked', path, self._blocked_paths):
+            logger.debug(f"[SemanticScholar] Skipping references of {id_type} {identifier}: previously blocked by publisher")
+            return []
         
         params = {
-            'fields': 'title,authors,year,externalIds',
+            'fields': self.FIELDS,
             'limit': 1000  # Maximum allowed by API
         }
         
@@ -107,7 +239,8 @@ class SemanticScholarAPI(CitationAPI):
             
             if not data or 'data' not in data:
                 logger.warning(f"[SemanticScholar] No references data found for {id_type}: {identifier}. Details on the endpoints we should use are at https://api.semanticscholar.org/api-docs/#tag/Paper-Data/operation/get_graph_get_paper_citations and https://api.semanticscholar.org/api-docs/#tag/Paper-Data/operation/get_graph_get_paper_references")
-                return []
+                # A malformed answer, not an empty reference list
+                raise FetchError(f"{endpoint}: response without 'data'")
             
             # Check if data is null (publisher blocking)
             if data['data'] is None:
@@ -120,6 +253,7 @@ class SemanticScholarAPI(CitationAPI):
                         logger.warning(f"[SemanticScholar] References data is null for {id_type}: {identifier}. This may indicate publisher restrictions on reference data.")
                 else:
                     logger.warning(f"[SemanticScholar] References data is null for {id_type}: {identifier}. This may indicate publisher restrictions on reference data.")
+                self._remember_negative('blocked', path, self._blocked_paths)
                 return []
             
             references = data['data']
@@ -129,26 +263,20 @@ class SemanticScholarAPI(CitationAPI):
                 
             logger.info(f"[SemanticScholar] Found {len(references)} references for {id_type}: {identifier}")
             
-            # Extract DOIs from references
-            referenced_dois = []
-            for ref in references:
-                if 'citedPaper' in ref and ref['citedPaper']:
-                    # Extract DOI from externalIds
-                    cited_paper = ref['citedPaper']
-                    if 'externalIds' in cited_paper and cited_paper['externalIds'] and 'DOI' in cited_paper['externalIds']:
-                        doi = cited_paper['externalIds']['DOI']
-                        if doi and isinstance(doi, str) and doi.startswith('10.') and '/' in doi:
-                            referenced_dois.append(doi.lower())
-            
-            # Add delay to be respectful to the API
-            time.sleep(0.1)
+            # Extract DOIs from references; a work listed twice (e.g. as preprint and article) counts once
+            referenced_dois = list(dict.fromkeys(self._iter_dois(references, 'citedPaper')))
             
             logger.info(f"[SemanticScholar] Successfully extracted {len(referenced_dois)} DOIs from references for {id_type}: {identifier}")
             return referenced_dois
             
+        except NotFoundError:
+            self._remember_negative('missing', path, self._missing_paths)
+            raise
+        except FetchError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching references for {id_type} {identifier}: {e}")
-            return []
+            raise FetchError(f"references of {id_type} {identifier}: {e}") from e
     
     def get_citations(self, identifier: str) -> List[str]:
         """
@@ -158,71 +286,146 @@ class SemanticScholarAPI(CitationAPI):
             identifier: A DOI string or MAG ID string
             
         Returns:
-            A list of DOIs citing the given identifier
+            A list of unique DOIs citing the given identifier
+
+        Raises:
+            NotFoundError: If Semantic Scholar does not know the identifier
+            FetchError: If a request failed
         """
-        # Clean DOI if it's a URL
-        if identifier.startswith("https://doi.org/"):
-            identifier = identifier[len("https://doi.org/"):]
-        
-        # Determine if this is a DOI or MAG ID and construct appropriate endpoint
-        if identifier.isdigit():
-            # This is a MAG ID
-            endpoint = f"paper/MAG:{identifier}/citations"
-            id_type = "MAG ID"
-        else:
-            # This is a DOI
-            endpoint = f"paper/{identifier}/citations"
-            id_type = "DOI"
+        path, id_type = _paper_path(identifier)
+        endpoint = f"{path}/citations"
+        if self._is_negative('missing', path, self._missing_paths):
+            logger.debug(f"[SemanticScholar] Skipping {id_type} {identifier}: previously not found")
+            raise NotFoundError(identifier)
         
-        citing_dois = []
-        offset = 0
-        limit = 1000  # Maximum allowed by API per request
+        limit = self.PAGE_LIMIT
+
+        def fetch_page(offset: int) -> List[Dict[str, Any]]:
+            params = {
+                'fields': self.FIELDS,
+                'limit': limit,
+                'offset': offset
+            }
+            data = self._make_request(endpoint, params)
+            if not data or 'data' not in data:
+                # A failed page, not the end of the list: returning what was collected so far
+                # would get a truncated list cached as complete
+                raise FetchError(f"{endpoint}: page at offset {offset} without 'data'")
+            return data['data']
         
         try:
             logger.debug(f"Fetching citations for {id_type}: {identifier}")
             
-            while True:
-                params = {
-                    'fields': 'title,authors,year,externalIds',
-                    'limit': limit,
-                    'offset': offset
-                }
-                
-                data = self._make_request(endpoint, params)
-                
-                if not data or 'data' not in data:
-                    break
-                
-                citations = data['data']
+            # Ordered set of citing DOIs, de-duplicated across pages as they arrive
+            citing_dois: Dict[str, None] = {}
+            for citations in self._iter_citation_pages(fetch_page):
                 if not citations:
                     break
-                
-                # Extract DOIs from citations
-                batch_dois = []
-                for citation in citations:
-                    if 'citingPaper' in citation and citation['citingPaper']:
-                        # Extract DOI from externalIds
-                        citing_paper = citation['citingPaper']
-                        if 'externalIds' in citing_paper and citing_paper['externalIds'] and 'DOI' in citing_paper['externalIds']:
-                            doi = citing_paper['externalIds']['DOI']
-                            if doi and isinstance(doi, str) and doi.startswith('10.') and '/' in doi:
-                                batch_dois.append(doi.lower())
-                
-                citing_dois.extend(batch_dois)
-                logger.debug(f"Processed batch: {len(batch_dois)} DOIs (offset: {offset})")
+                before = len(citing_dois)
+                citing_dois.update(dict.fromkeys(self._iter_dois(citations, 'citingPaper')))
+                logger.debug(f"Processed batch: {len(citing_dois) - before} DOIs")
                 
                 # Check if we have more results
                 if len(citations) < limit:
                     break
-                
-                offset += limit
-                
-                # Add delay between paginated requests
-                time.sleep(0.1)
+            else:
+                logger.warning(f"[SemanticScholar] Only the first {self.MAX_OFFSET} citations of {id_type} {identifier} can be fetched")
             
             logger.info(f"[SemanticScholar] Successfully extracted {len(citing_dois)} DOIs from citations for {id_type}: {identifier}")
-            return citing_dois
+            return list(citing_dois)
             
+        except NotFoundError:
+            self._remember_negative('missing', path, self._missing_paths)
+            raise
+        except FetchError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching citations for {id_type} {identifier}: {e}")
-            return []
\ No newline at end of file
+            raise FetchError(f"citations of {id_type} {identifier}: {e}") from e
+
+    def _get_batch(self, identifiers: List[str], method: str) -> Dict[str, Optional[List[str]]]:
+        """
+        Fetch one direction ('references' or 'citations') for several identifiers with a single
+        POST to /paper/batch, which embeds the linked papers of every requested paper.
+
+        Papers whose embedded list is shorter than their reference/citation count (the batch
+        endpoint truncates long lists) are fetched again through the paginated per-paper
+        endpoint. If the batch request still fails after the session's retries, every identifier
+        is fetched one by one.
+        Identifiers already known to be missing are not sent.
+        """
+        count_field = 'referenceCount' if method == 'references' else 'citationCount'
+        results: Dict[str, Optional[List[str]]] = {}
+        requested = []
+        paper_ids = []
+        for identifier in identifiers:
+            if self._is_negative('missing', _paper_path(identifier)[0], self._missing_paths):
+                results[identifier] = None
+                continue
+            cleaned = identifier[len("https://doi.org/"):] if identifier.startswith("https://doi.org/") else identifier
+            requested.append(identifier)
+            paper_ids.append(f"MAG:{cleaned}" if cleaned.isdigit() else f"DOI:{cleaned}")
+        if not requested:
+            return results
+
+        try:
+            with self._limiter:
+                response = self.session.post(
+                    f"{self.BASE_URL}/paper/batch",
+                    params={'fields': f"{count_field},{method}.{self.FIELDS}"},
+                    json={'ids': paper_ids},
+                    timeout=60,
+                )
+            response.raise_for_status()
+            papers = loads_json(response.content)
+        except Exception as e:
+            logger.warning(f"[SemanticScholar] Batch request failed, fetching {method} one by one: {e}")
+            results.update(getattr(super(), f"get_{method}_batch")(requested))
+            return results
+
+        for identifier, paper in zip(requested, papers):
+            if paper is None:
+                # Unknown to Semantic Scholar
+                results[identifier] = None
+                self._remember_negative('missing', _paper_path(identifier)[0], self._missing_paths)
+                continue
+            linked = paper.get(method) or []
+            if len(linked) < (paper.get(count_field) or 0):
+                logger.debug(f"[SemanticScholar] {method.capitalize()} of {identifier} truncated in batch, paginating")
+                try:
+                    results[identifier] = getattr(self, f"get_{method}")(identifier)
+                except NotFoundError:
+                    results[identifier] = None
+                except Exception as e:
+                    # Left out, so it is reported as failed rather than cached as empty
+                    logger.error(f"Error paginating {method} for {identifier}: {e}")
+                continue
+            results[identifier] = list(dict.fromkeys(self._iter_dois(linked, None)))
+        logger.debug(f"[SemanticScholar] Fetched {method} for {len(requested)} identifiers in one batch request")
+        return {identifier: results[identifier] for identifier in identifiers if identifier in results}
+
+    def get_references_batch(self, identifiers: List[str]) -> Dict[str, Optional[List[str]]]:
+        """
+        Fetch DOIs of works referenced by each of the given identifiers via /paper/batch.
+
+        Args:
+            identifiers: DOI or MAG ID strings, at most BATCH_SIZE of them
+
+        Returns:
+            A dictionary mapping each identifier to the list of DOIs it references,
+            or to None if Semantic Scholar does not know the identifier
+        """
+        return self._get_batch(identifiers, 'references')
+
+    def get_citations_batch(self, identifiers: List[str]) -> Dict[str, Optional[List[str]]]:
+        """
+        Fetch DOIs of works citing each of the given identifiers via /paper/batch.
+
+        Args:
+            identifiers: DOI or MAG ID strings, at most BATCH_SIZE of them
+
+        Returns:
+            A dictionary mapping each identifier to the list of DOIs citing it,
+            or to None if Semantic Scholar does not know the identifier
+        """
+        return self._get_batch(identifiers, 'citations')
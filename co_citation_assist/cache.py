@@ -0,0 +1,116 @@
+"""
+Persistent on-disk cache for citation API results.
+
+Entries are stored in a small SQLite database so repeated analyses over
+overlapping DOI sets can skip the network entirely.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Hashable, Optional, Sequence
+
+from .utils import loads_json
+
+logger = logging.getLogger(__name__)
+
+# Default location of the cache, relative to the working directory (like ./output)
+DEFAULT_CACHE_DIR = Path(".cca_cache")
+# Default time-to-live for cached entries: 90 days
+DEFAULT_TTL = 90 * 24 * 60 * 60
+# Time-to-live for negative results (unknown identifiers, empty lists): 1 day, since these
+# often change as the services index new works
+NEGATIVE_TTL = 24 * 60 * 60
+
+# Returned by ResponseCache.get on a miss, so that cached None/empty results stay distinguishable
+MISS = object()
+
+
+class ResponseCache:
+    """
+    Thread-safe key/value cache backed by SQLite.
+
+    Keys are sequences of strings (e.g. ``(api_name, method, identifier)``) and values are
+    anything JSON-serializable, including ``None`` and empty lists for negative results.
+    Each entry also records when it was fetched.
+    """
+
+    # Bump whenever the shape of cached values changes; entries written under an older
+    # version live in a different table and are simply never read again
+    SCHEMA_VERSION = 1
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, ttl: Optional[float] = DEFAULT_TTL):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            directory: Directory holding the cache database.
+            ttl: Default time-to-live in seconds for new entries; None keeps entries forever.
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path = self.directory / "cache.sqlite3"
+        self._table = f"entries_v{self.SCHEMA_VERSION}"
+        self._lock = threading.Lock()
+        # Shared by the analyzer's worker threads; access is serialized by self._lock
+        self._conn = sqlite3.connect(str(self._path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, fetched_at REAL NOT NULL, expires_at REAL)"
+            )
+            self._conn.commit()
+        logger.info(f"Using response cache at {self._path}")
+
+    @staticmethod
+    def _encode_key(key: Sequence[Hashable]) -> str:
+        return json.dumps(list(key), ensure_ascii=False)
+
+    def get(self, key: Sequence[Hashable]) -> Any:
+        """Returns the cached value for `key`, or `MISS` if absent or expired."""
+        encoded = self._encode_key(key)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (encoded,)
+            ).fetchone()
+        if row is None:
+            return MISS
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return MISS
+        # Cached responses are the bulk of what a warm run reads back; parse with orjson when installed
+        return loads_json(value)
+
+    def set(self, key: Sequence[Hashable], value: Any, expire: Optional[float] = None) -> None:
+        """
+        Stores `value` under `key`.
+
+        Args:
+            key: Cache key.
+            value: JSON-serializable value.
+            expire: Time-to-live in seconds; defaults to the cache-wide TTL.
+        """
+        ttl = self.ttl if expire is None else expire
+        fetched_at = time.time()
+        expires_at = fetched_at + ttl if ttl is not None else None
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, fetched_at, expires_at) VALUES (?, ?, ?, ?)",
+                (self._encode_key(key), encoded, fetched_at, expires_at),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,18 +1,24 @@
 import typer
 from pathlib import Path
 import logging
+import re
 from typing_extensions import Annotated
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 import sys
 import csv # Import csv module
-import json # Import json module
+import operator
 import os # Import os module for directory creation
 import datetime # To potentially use for filenames if needed, but keeping fixed for now
 
-from .ris_parser import extract_dois_from_ris, extract_identifiers_from_ris
+from .ris_parser import _DOI_RE, extract_dois_from_ris, extract_identifiers_from_ris_many
 from .apis.composite import CompositeAPI
-from .analyzer import CocitationAnalyzer, SummaryRecord, ResultRecord, RawDataRecord, Doi # Import new types
-from .network_generator import NetworkGenerator, LinkingMode # Import network generation types
+from .cache import ResponseCache, DEFAULT_CACHE_DIR, DEFAULT_TTL
+from .analyzer import CocitationAnalyzer, DEFAULT_MAX_WORKERS, SummaryRecord, ResultRecord, RawDataRecord, Doi # Import new types
+from .network_generator import NetworkGenerator, LinkingMode, write_network_json # Import network generation types
+from .utils import dumps_json, loads_json
 
 # Application instance
 app = typer.Typer(
@@ -40,21 +46,37 @@ def setup_file_logging(output_dir: Path):
     logger.info(f"CLI log will be saved to: {log_file}")
     return log_file
 
-def write_csv(filepath: Path, data: list, fieldnames: list):
-    """Helper function to write a list of dictionaries to a CSV file."""
+# Rows handed to the csv writer at a time when streaming, bounding memory while keeping the loop in C
+CSV_CHUNK_ROWS = 10000
+# Write buffer for the CSV files: 1 MiB instead of the 8 KiB default, so large files take far fewer write calls
+WRITE_BUFFER_SIZE = 1 << 20
+
+def write_csv_rows(filepath: Path, header: List[str], rows: Iterable[tuple]):
+    """
+    Helper function to write positional rows (tuples in `header` order) to a CSV file.
+
+    `rows` may be a list or a lazy iterator; iterators are written as they are consumed, in chunks of
+    CSV_CHUNK_ROWS, so the full set of rows never has to be held in memory. No file is created if
+    there are no rows.
+    """
     filename = filepath.name # For logging/printing
-    if not data:
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
         logger.info(f"No data to write for {filename}. Skipping file creation.")
         print(f"No results found for {filename}.")
         return
     
     try:
-        # Use the full Path object to open the file
-        with filepath.open('w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
-        logger.info(f"Successfully wrote {len(data)} rows to {filepath}")
+        written = 0
+        # Builtin open on the plain path string skips Path.open's extra indirection
+        with open(os.fspath(filepath), 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(header)
+            for chunk in chain(([first],), iter(lambda: list(islice(rows, CSV_CHUNK_ROWS)), [])):
+                writer.writerows(chunk)
+                written += len(chunk)
+        logger.info(f"Successfully wrote {written} rows to {filepath}")
         print(f"Results saved to: {filepath}")
     except IOError as e:
         logger.error(f"Failed to write to {filepath}: {e}")
@@ -64,33 +86,23 @@ def write_csv(filepath: Path, data: list, fieldnames: list):
         print(f"Error: An unexpected error occurred while writing {filepath}.", file=sys.stderr)
 
 def validate_doi(doi: str) -> bool:
-    """Validate a DOI string using the same logic as the RIS parser."""
-    return doi.startswith('10.') and '/' in doi
+    """Validate a DOI string (as cleaned by process_doi_input) with the RIS parser's DOI pattern."""
+    return _DOI_RE.fullmatch(doi) is not None
+
+# DOI prefixes accepted on input ("doi:", "https://doi.org/", "http://dx.doi.org/", ...), matched in one pass
+_DOI_PREFIX_RE = re.compile(r'^(?:doi:|https?://(?:dx\.)?doi\.org/)\s*', re.IGNORECASE)
 
 def process_doi_input(doi: str) -> str:
     """Process and clean a DOI input string."""
-    doi = doi.strip()
-    # Handle potential prefixes like "doi:", "DOI:", "https://doi.org/"
-    if doi.lower().startswith('doi:'):
-        doi = doi[4:].strip()
-    elif doi.lower().startswith('https://doi.org/'):
-        doi = doi[16:].strip()
-    elif doi.lower().startswith('http://doi.org/'):
-        doi = doi[15:].strip()
-    elif doi.lower().startswith('https://dx.doi.org/'):
-        doi = doi[19:].strip()
-    elif doi.lower().startswith('http://dx.doi.org/'):
-        doi = doi[18:].strip()
-    
-    return doi.lower()
+    return _DOI_PREFIX_RE.sub('', doi.strip(), count=1).lower()
 
-def write_json(filepath: Path, data: dict):
-    """Helper function to write a dictionary to a JSON file."""
+def write_json(filepath: Path, data: dict, pretty: bool = False):
+    """Helper function to write a dictionary to a JSON file, compact unless `pretty` is set."""
     filename = filepath.name # For logging/printing
     try:
-        with filepath.open('w', encoding='utf-8') as jsonfile:
-            # Use indent for readability
-            json.dump(data, jsonfile, indent=4, ensure_ascii=False)
+        # Encoded with orjson when the "fast" extra is installed
+        with open(os.fspath(filepath), 'wb') as jsonfile:
+            jsonfile.write(dumps_json(data, pretty=pretty))
         logger.info(f"Successfully wrote detailed data to {filepath}")
         print(f"Detailed references/citations saved to: {filepath}")
     except IOError as e:
@@ -100,6 +112,39 @@ def write_json(filepath: Path, data: dict):
         logger.error(f"An unexpected error occurred while writing {filepath}: {e}", exc_info=True)
         print(f"Error: An unexpected error occurred while writing {filepath}.", file=sys.stderr)
 
+class RawDataWriter:
+    """
+    Writes the detailed references/citations JSON object one entry at a time.
+
+    Used as the analyzer's raw_sink, so each initial DOI's record goes to disk as soon as it is
+    fetched instead of the whole mapping being held in memory until the end of the run. The file
+    has the same content and layout as write_json would produce for the collected dictionary.
+    """
+
+    def __init__(self, filepath: Path, pretty: bool = False):
+        self.filepath = filepath
+        self.pretty = pretty
+        self.count = 0
+        self._file = open(os.fspath(filepath), 'wb', buffering=WRITE_BUFFER_SIZE)
+        self._file.write(b'{')
+
+    def __call__(self, identifier: str, record: RawDataRecord):
+        encoded = dumps_json(record, pretty=self.pretty)
+        if self.pretty:
+            # Nest the record one level deeper, as an indented dump of the whole object would
+            entry = b'\n  ' + dumps_json(identifier) + b': ' + encoded.replace(b'\n', b'\n  ')
+        else:
+            entry = dumps_json(identifier) + b':' + encoded
+        self._file.write(b',' + entry if self.count else entry)
+        self.count += 1
+
+    def close(self):
+        """Closes the JSON object and the file."""
+        if self._file.closed:
+            return
+        self._file.write(b'\n}' if self.pretty and self.count else b'}')
+        self._file.close()
+
 @app.callback(invoke_without_command=True)
 def analyze(
     ctx: typer.Context,
@@ -133,12 +178,55 @@ def analyze(
             help="Only collect references and citations data without performing co-citation analysis. Outputs only summary.csv and detailed_references_citations.json.",
         )
     ] = False,
+    extra_ris_files: Annotated[Optional[List[Path]],
+        typer.Option(
+            "--ris",
+            help="Additional .ris file(s) whose references join the initial set (can be specified multiple times). Files are parsed in parallel.",
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            readable=True,
+            resolve_path=True,
+        )
+    ] = None,
     dois: Annotated[Optional[List[str]],
         typer.Option(
             "--doi",
             help="DOI(s) to analyze directly (can be specified multiple times). Use instead of RIS file.",
         )
     ] = None,
+    no_cache: Annotated[bool,
+        typer.Option(
+            "--no-cache",
+            help=f"Do not read or write the persistent response cache ({DEFAULT_CACHE_DIR}/); always query the APIs.",
+        )
+    ] = False,
+    cache_ttl: Annotated[float,
+        typer.Option(
+            "--cache-ttl",
+            help="Days a cached response stays valid before it is fetched again. Entries for unknown papers and empty results expire after one day regardless.",
+            min=0,
+        )
+    ] = DEFAULT_TTL / 86400,
+    concurrency: Annotated[int,
+        typer.Option(
+            "--concurrency",
+            help="Number of identifiers (or batches of identifiers) fetched concurrently. Requests stay within each API's rate limit.",
+            min=1,
+        )
+    ] = DEFAULT_MAX_WORKERS,
+    pretty: Annotated[bool,
+        typer.Option(
+            "--pretty",
+            help="Indent the JSON output for reading. By default it is written compact, which is smaller and faster to load.",
+        )
+    ] = False,
+    buffer_raw: Annotated[bool,
+        typer.Option(
+            "--buffer-raw",
+            help="Keep all fetched references/citations in memory and write the detailed JSON at the end, instead of writing each DOI's entry as it is fetched.",
+        )
+    ] = False,
     # Removed output_file option
     # TODO: Add option for API choice (e.g., --api openalex)
     # TODO: Add option for log level (e.g., --verbose)
@@ -148,7 +236,7 @@ def analyze(
     Run co-citation analysis or base data collection on a given RIS file or DOI(s).
 
     Input options:
-    - Provide a RIS file path as the first argument
+    - Provide a RIS file path as the first argument, and/or more RIS files with --ris (merged into one initial set)
     - Use --doi option to specify DOI(s) directly (can be used multiple times)
 
     In standard mode, outputs results into an 'output/' subdirectory:
@@ -166,13 +254,14 @@ def analyze(
     # If no subcommand is provided, continue with the analysis
     if ctx.invoked_subcommand is not None:
         return
+    ris_files = ([ris_file] if ris_file else []) + list(extra_ris_files or [])
     # Validate input - must provide either RIS file or DOIs
-    if not ris_file and not dois:
+    if not ris_files and not dois:
         logger.error("No input provided. Must specify either RIS file or DOI(s).")
         print("Error: Please provide either a RIS file path or use --doi to specify DOI(s).", file=sys.stderr)
         raise typer.Exit(code=1)
     
-    if ris_file and dois:
+    if ris_files and dois:
         logger.error("Cannot specify both RIS file and DOI options.")
         print("Error: Please use either RIS file OR --doi option, not both.", file=sys.stderr)
         raise typer.Exit(code=1)
@@ -197,7 +286,7 @@ def analyze(
         print(f"Error: Could not create output directory {output_dir}. Check permissions.", file=sys.stderr)
         raise typer.Exit(code=1)
 
-    input_source = ris_file.name if ris_file else f"{len(dois)} DOI(s)"
+    input_source = ", ".join(path.name for path in ris_files) if ris_files else f"{len(dois)} DOI(s)"
     logger.info(f"Starting analysis for input: {input_source}")
     if base_only:
         logger.info("Running in base-only mode (no co-citation analysis)")
@@ -207,38 +296,23 @@ def analyze(
     logger.info(f"Output files will be saved in: {output_dir.resolve()}")
 
     # --- Start: Process input (RIS file or DOIs) ---
-    if ris_file:
-        print(f"Parsing RIS file: {ris_file.name}...")
-
-        # Count potential DOI lines first for comparison
-        do_line_count = 0
-        try:
-            # Use utf-8-sig to handle potential BOM
-            with ris_file.open('r', encoding='utf-8-sig') as f:
-                for line in f:
-                    # Adjusted to common RIS DOI tags (DO or DI)
-                    tag = line[:2]
-                    if tag in ("DO", "DI"): 
-                        do_line_count += 1
-            logger.debug(f"Found {do_line_count} lines starting with 'DO' or 'DI' in {ris_file.name}")
-        except Exception as e:
-            logger.warning(f"Could not pre-count DO/DI lines in {ris_file.name}: {e}")
-            # Proceed without the count if reading fails here, parser will handle errors later
+    if ris_files:
+        print(f"Parsing RIS file(s): {input_source}...")
 
-        # Extract DOIs and MAG IDs using the parser
+        # Extract DOIs and MAG IDs using the parser (several files in parallel, merged into one
+        # set); it also counts potential DOI lines ('DO'/'DI') in the same pass, for comparison below
         try:
-            initial_dois, initial_mag_ids = extract_identifiers_from_ris(ris_file)
-            initial_dois = set(initial_dois)
-            initial_mag_ids = set(initial_mag_ids)
+            initial_dois, initial_mag_ids, do_line_count = extract_identifiers_from_ris_many(ris_files)
+            logger.debug(f"Found {do_line_count} lines starting with 'DO' or 'DI' in {input_source}")
         except Exception as e:
-             logger.error(f"Failed to parse RIS file {ris_file}: {e}", exc_info=True)
-             print(f"Error: Failed to parse {ris_file}. Check file format and logs.", file=sys.stderr)
+             logger.error(f"Failed to parse RIS file(s) {input_source}: {e}", exc_info=True)
+             print(f"Error: Failed to parse {input_source}. Check file format and logs.", file=sys.stderr)
              raise typer.Exit(code=1)
 
         total_identifiers = len(initial_dois) + len(initial_mag_ids)
         if total_identifiers == 0:
-            logger.error(f"No valid identifiers extracted from {ris_file}. Aborting.")
-            print(f"Error: Could not extract any valid DOIs or MAG IDs from {ris_file}. Please check the file format and content.", file=sys.stderr)
+            logger.error(f"No valid identifiers extracted from {input_source}. Aborting.")
+            print(f"Error: Could not extract any valid DOIs or MAG IDs from {input_source}. Please check the file format and content.", file=sys.stderr)
             raise typer.Exit(code=1)
         
         print(f"Found {len(initial_dois)} unique DOIs and {len(initial_mag_ids)} unique MAG IDs in the initial set.")
@@ -287,8 +361,9 @@ def analyze(
     print("\nInitializing API clients (OpenAlex + Semantic Scholar)...")
     try:
         # Use composite API that combines OpenAlex and Semantic Scholar
-        api_client = CompositeAPI()
-        analyzer = CocitationAnalyzer(api_client, initial_dois, initial_mag_ids)
+        cache = None if no_cache else ResponseCache(ttl=cache_ttl * 86400)
+        api_client = CompositeAPI(cache=cache)
+        analyzer = CocitationAnalyzer(api_client, initial_dois, initial_mag_ids, max_workers=concurrency, cache=cache)
     except Exception as e:
         logger.critical(f"Failed to initialize API client or Analyzer: {e}", exc_info=True)
         print(f"Error: Failed to initialize API client: {e}", file=sys.stderr)
@@ -296,55 +371,80 @@ def analyze(
 
 
     # 3. Run Analysis
+    # Raw records are streamed into the detailed JSON during fetching unless --buffer-raw is given
+    detailed_json_path = output_dir / "detailed_references_citations.json"
+    raw_writer: Optional[RawDataWriter] = None
+    if not buffer_raw:
+        try:
+            raw_writer = RawDataWriter(detailed_json_path, pretty=pretty)
+        except OSError as e:
+            # Fall back to collecting the records; the write at the end reports the error if it persists
+            logger.warning(f"Could not open {detailed_json_path} for streaming, buffering raw data instead: {e}")
+
     if base_only:
         print(f"\nRunning base collection (no co-citation analysis). This may take some time...")
         summary_data: List[SummaryRecord] = []
         raw_data: Dict[Doi, RawDataRecord] = {}
         try:
-            summary_data, raw_data = analyzer.run_base_collection()
+            summary_data, raw_data = analyzer.run_base_collection(raw_sink=raw_writer)
         except Exception as e:
             logger.critical(f"An unexpected error occurred during base collection: {e}", exc_info=True)
             print(f"\nError during base collection: {e}. Check logs for details.", file=sys.stderr)
             raise typer.Exit(code=1)
+        finally:
+            # Release the pooled HTTP connections once all fetching is done
+            api_client.close()
+            if cache is not None:
+                cache.close()
+            if raw_writer is not None:
+                raw_writer.close()
         
         # Set empty results for co-citation analysis
-        backward_results: List[ResultRecord] = []
-        forward_results: List[ResultRecord] = []
+        backward_results: Iterable[ResultRecord] = []
+        forward_results: Iterable[ResultRecord] = []
     else:
         print(f"\nRunning analysis (N={n_threshold}, M={m_threshold}). This may take some time...")
         summary_data: List[SummaryRecord] = []
-        backward_results: List[ResultRecord] = []
-        forward_results: List[ResultRecord] = []
+        backward_results: Iterable[ResultRecord] = []
+        forward_results: Iterable[ResultRecord] = []
         raw_data: Dict[Doi, RawDataRecord] = {}
         try:
             # Unpack the fourth returned value (raw_data)
+            # Backward/forward results stay lazy and are streamed straight into their CSV files
             summary_data, backward_results, forward_results, raw_data = analyzer.run_analysis(
                 min_references_n=n_threshold,
-                min_citations_m=m_threshold
+                min_citations_m=m_threshold,
+                materialize=False,
+                raw_sink=raw_writer
             )
         except Exception as e:
              logger.critical(f"An unexpected error occurred during analysis: {e}", exc_info=True)
              print(f"\nError during analysis: {e}. Check logs for details.", file=sys.stderr)
              raise typer.Exit(code=1) # Exit if analysis fails catastrophically
+        finally:
+            # Release the pooled HTTP connections once all fetching is done
+            api_client.close()
+            if cache is not None:
+                cache.close()
+            if raw_writer is not None:
+                raw_writer.close()
 
     # 4. Write Results to Files in output_dir
     print("\nWriting results...")
 
+    # The output files are independent, so they are queued here and written concurrently below
+    writes = []
+
     # Write Summary CSV
-    # Define all possible fieldnames including API statistics
-    summary_fieldnames = [
-        'doi', 'references_found', 'citations_found', 'api', 'retrieval_timestamp',
-        'references_OpenAlex', 'references_SemanticScholar', 'references_Overlap',
-        'references_OpenAlex_unique', 'references_SemanticScholar_unique', 'references_Total_unique',
-        'citations_OpenAlex', 'citations_SemanticScholar', 'citations_Overlap',
-        'citations_OpenAlex_unique', 'citations_SemanticScholar_unique', 'citations_Total_unique'
-    ]
-    write_csv(output_dir / "summary.csv", summary_data, summary_fieldnames)
+    # All summary columns, including API statistics, in SummaryRecord field order
+    # SummaryRecord NamedTuples are already positional rows
+    summary_fieldnames = list(SummaryRecord._fields)
+    writes.append(partial(write_csv_rows, output_dir / "summary.csv", summary_fieldnames, summary_data))
 
     # Write Backward CSV (skip in base-only mode)
     if not base_only and n_threshold > 0:
         backward_fieldnames = ['novel_doi', 'initial_citing_doi']
-        write_csv(output_dir / "backward.csv", backward_results, backward_fieldnames)
+        writes.append(partial(write_csv_rows, output_dir / "backward.csv", backward_fieldnames, map(operator.itemgetter(*backward_fieldnames), backward_results)))
     elif not base_only:
         logger.info("Skipping backward.csv creation as N=0.")
         print("Backward analysis skipped (N=0).")
@@ -355,7 +455,7 @@ def analyze(
     # Write Forward CSV (skip in base-only mode)
     if not base_only and m_threshold > 0:
         forward_fieldnames = ['novel_doi', 'initial_cited_doi']
-        write_csv(output_dir / "forward.csv", forward_results, forward_fieldnames)
+        writes.append(partial(write_csv_rows, output_dir / "forward.csv", forward_fieldnames, map(operator.itemgetter(*forward_fieldnames), forward_results)))
     elif not base_only:
         logger.info("Skipping forward.csv creation as M=0.")
         print("Forward analysis skipped (M=0).")
@@ -363,8 +463,18 @@ def analyze(
         logger.info("Skipping forward.csv creation in base-only mode.")
         print("Forward analysis skipped (base-only mode).")
 
-    # Write Detailed JSON
-    write_json(output_dir / "detailed_references_citations.json", raw_data)
+    # Write Detailed JSON (already on disk when it was streamed during the run)
+    if raw_writer is None:
+        writes.append(partial(write_json, detailed_json_path, raw_data, pretty=pretty))
+    else:
+        logger.info(f"Successfully wrote detailed data for {raw_writer.count} identifiers to {detailed_json_path}")
+        print(f"Detailed references/citations saved to: {detailed_json_path}")
+
+    # Each writer has its own file and data and logs its own errors; the threads overlap the
+    # disk writes, during which the GIL is released
+    with ThreadPoolExecutor(max_workers=len(writes), thread_name_prefix="output") as executor:
+        for future in as_completed([executor.submit(write) for write in writes]):
+            future.result()
 
     print("\nAnalysis finished.")
 
@@ -406,6 +516,25 @@ def network(
             min=1,
         )
     ] = None,
+    no_cache: Annotated[bool,
+        typer.Option(
+            "--no-cache",
+            help=f"Do not read or write the persistent metadata cache ({DEFAULT_CACHE_DIR}/); always query OpenAlex.",
+        )
+    ] = False,
+    cache_ttl: Annotated[float,
+        typer.Option(
+            "--cache-ttl",
+            help="Days cached node metadata stays valid before it is fetched again. Papers OpenAlex does not know are re-checked after one day.",
+            min=0,
+        )
+    ] = DEFAULT_TTL / 86400,
+    pretty: Annotated[bool,
+        typer.Option(
+            "--pretty",
+            help="Indent the network JSON for reading. By default it is written compact, which is smaller and faster to load.",
+        )
+    ] = False,
 ):
     """
     Generate a network structure from detailed citations JSON file.
@@ -426,13 +555,13 @@ def network(
     if max_nodes:
         print(f"Maximum nodes: {max_nodes}")
     
+    cache = None if no_cache else ResponseCache(ttl=cache_ttl * 86400)
     try:
         # Initialize network generator
-        generator = NetworkGenerator()
+        generator = NetworkGenerator(cache=cache)
         
         # Load citations data
-        with citations_file.open('r', encoding='utf-8') as f:
-            citations_data = json.load(f)
+        citations_data = loads_json(citations_file.read_bytes())
         
         # Generate network
         network_data = generator.generate_network(
@@ -443,7 +572,7 @@ def network(
         )
         
         # Write network file
-        write_json(output_file, network_data)
+        write_network_json(output_file, network_data, pretty=pretty)
         
         # Print summary
         num_nodes = len(network_data.get("network", {}).get("items", []))
@@ -457,6 +586,9 @@ def network(
         logger.error(f"Failed to generate network: {e}", exc_info=True)
         print(f"Error: Failed to generate network. {e}", file=sys.stderr)
         raise typer.Exit(code=1)
+    finally:
+        if cache is not None:
+            cache.close()
 
 # Entry point for the script defined in pyproject.toml
 def main():
@@ -2,13 +2,14 @@
 """Standalone network generation CLI for co-citation-assist."""
 
 import typer
-import json
 import logging
 from pathlib import Path
 from typing_extensions import Annotated
 from typing import Optional
 
-from .network_generator import NetworkGenerator, LinkingMode
+from .cache import ResponseCache, DEFAULT_CACHE_DIR, DEFAULT_TTL
+from .network_generator import NetworkGenerator, LinkingMode, write_network_json
+from .utils import loads_json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -71,6 +72,25 @@ def main(
             max=1.0,
         )
     ] = 0.5,
+    no_cache: Annotated[bool,
+        typer.Option(
+            "--no-cache",
+            help=f"Do not read or write the persistent metadata cache ({DEFAULT_CACHE_DIR}/); always query OpenAlex.",
+        )
+    ] = False,
+    cache_ttl: Annotated[float,
+        typer.Option(
+            "--cache-ttl",
+            help="Days cached node metadata stays valid before it is fetched again. Papers OpenAlex does not know are re-checked after one day.",
+            min=0,
+        )
+    ] = DEFAULT_TTL / 86400,
+    pretty: Annotated[bool,
+        typer.Option(
+            "--pretty",
+            help="Indent the network JSON for reading. By default it is written compact, which is smaller and faster to load.",
+        )
+    ] = False,
 ):
     """
     Generate a network structure from detailed citations JSON file.
@@ -107,13 +127,13 @@ def main(
         print(f"Maximum nodes: {max_nodes}")
     print("Fetching metadata from OpenAlex API (this may take some time)...")
     
+    cache = None if no_cache else ResponseCache(ttl=cache_ttl * 86400)
     try:
         # Initialize network generator
-        generator = NetworkGenerator()
+        generator = NetworkGenerator(cache=cache)
         
         # Load citations data
-        with citations_file.open('r', encoding='utf-8') as f:
-            citations_data = json.load(f)
+        citations_data = loads_json(citations_file.read_bytes())
         
         print(f"Loaded data with {len(citations_data)} papers")
         
@@ -132,8 +152,7 @@ def main(
         )
         
         # Write network file
-        with output_file.open('w', encoding='utf-8') as f:
-            json.dump(network_data, f, indent=2, ensure_ascii=False)
+        write_network_json(output_file, network_data, pretty=pretty)
         
         # Print summary
         num_nodes = len(network_data.get("network", {}).get("items", []))
@@ -153,6 +172,9 @@ def main(
         logger.error(f"Failed to generate network: {e}", exc_info=True)
         print(f"Error: Failed to generate network. {e}")
         raise typer.Exit(code=1)
+    finally:
+        if cache is not None:
+            cache.close()
 
 if __name__ == "__main__":
     typer.run(main)
\ No newline at end of file
@@ -1,18 +1,35 @@
-import json
+import datetime
+import html
 import logging
-import time
+import os
 import random
-from typing import Dict, List, Set, Optional, Any, Tuple
+from typing import Dict, FrozenSet, List, NamedTuple, Set, Optional, Any, Tuple
 from enum import Enum
 from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import combinations
 import re
+import sys
+import unicodedata
 from dataclasses import dataclass
+from pathlib import Path
 from tqdm import tqdm
 
 from .apis.openalex import OpenAlexAPI
+from .cache import MISS, NEGATIVE_TTL, ResponseCache
+from .utils import dumps_json
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # Optional speed-up for network generation, installed with the "sparse" extra
+    np = sparse = None
 
 logger = logging.getLogger(__name__)
 
+# Array elements (nodes or links) encoded per write call when streaming a network file
+NETWORK_WRITE_CHUNK = 1000
+
 class LinkingMode(str, Enum):
     """Enum for different network linking modes."""
     BIBLIOGRAPHIC_COUPLING = "bibliographic_coupling"
@@ -32,20 +49,151 @@ class NodeMetadata:
     source: Optional[str] = None
     citations: Optional[int] = None
 
-@dataclass
-class NetworkLink:
-    """A link between two nodes in the network."""
+class NetworkLink(NamedTuple):
+    """
+    A link between two nodes in the network.
+
+    A NamedTuple rather than a dataclass: networks can hold millions of links, and a tuple
+    carries no per-instance attribute dict and is cheaper to construct.
+    """
     source_id: int
     target_id: int
     strength: float
 
+def _interned_sets(citations_data: Dict[str, Dict[str, List[str]]], key: str) -> Dict[str, FrozenSet[str]]:
+    """
+    Map each paper that has a `key` ('references' or 'citations') list to the frozenset of its entries.
+
+    The same DOI appears in the lists of many papers, and each occurrence is a separate string
+    once loaded from JSON. Interning makes the copies share one object, so the sets hold one
+    string per DOI and equality checks while counting short-circuit on identity. A null list
+    (a failed fetch) gives an empty set.
+    """
+    intern = sys.intern
+    return {
+        paper_id: frozenset(map(intern, data[key] or ()))
+        for paper_id, data in citations_data.items()
+        if key in data
+    }
+
+def _random_coordinates(count: int) -> List[Tuple[float, float]]:
+    """
+    Draw up to `count` distinct random (x, y) points in [-2, 2]², rounded to 4 decimals, with numpy.
+
+    The rare duplicate draws are dropped rather than redrawn, so fewer than `count` points may be
+    returned; without numpy none are.
+    """
+    if np is None or count <= 0:
+        return []
+    drawn = np.round(np.random.uniform(-2.0, 2.0, size=(count, 2)), 4)
+    _, first = np.unique(drawn, axis=0, return_index=True)
+    return [tuple(point) for point in drawn[np.sort(first)].tolist()]
+
+def _build_incidence(item_sets: List[FrozenSet[str]]) -> Tuple[Any, List[str]]:
+    """
+    Build the boolean paper x item incidence matrix (CSR, int32) for `item_sets`.
+
+    Item strings are factorized to column indices in first-seen order; the returned list maps
+    each column back to its item. Requires numpy and scipy.
+    """
+    columns: Dict[str, int] = {}
+    column_of = columns.setdefault
+    indices = [column_of(item, len(columns)) for items in item_sets for item in items]
+    indptr = np.zeros(len(item_sets) + 1, dtype=np.int64)
+    np.cumsum([len(items) for items in item_sets], out=indptr[1:])
+    incidence = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), np.asarray(indices, dtype=np.int64), indptr),
+        shape=(len(item_sets), len(columns))
+    )
+    return incidence, list(columns)
+
+def _count_shared(item_sets: List[FrozenSet[str]], min_count: int = 1) -> Dict[Tuple[int, int], int]:
+    """
+    Count, for every pair of positions (i, j) with i < j in `item_sets`, how many items the two sets share.
+
+    Pairs sharing nothing are left out. With numpy and scipy installed the counts are the upper
+    triangle of the sparse product C·Cᵀ of the incidence matrix. Otherwise they are accumulated
+    from an inverted index (item -> positions of the sets containing it). Either way only pairs
+    that share at least one item are visited, rather than intersecting all N² pairs of sets.
+
+    Pairs sharing fewer than `min_count` items may be left out as well; the sparse path drops
+    them in bulk before any Python objects are created for them.
+    """
+    if sparse is not None:
+        incidence, _ = _build_incidence(item_sets)
+        shared = sparse.triu(incidence @ incidence.T, k=1).tocoo()
+        rows, cols, counts = shared.row, shared.col, shared.data
+        if min_count > 1:
+            keep = counts >= min_count
+            rows, cols, counts = rows[keep], cols[keep], counts[keep]
+        return dict(zip(zip(rows.tolist(), cols.tolist()), counts.tolist()))
+
+    index: Dict[str, List[int]] = defaultdict(list)
+    for position, items in enumerate(item_sets):
+        for item in items:
+            index[item].append(position)
+
+    pair_counts: Counter = Counter()
+    for positions in index.values():
+        if len(positions) > 1:
+            # Positions were appended in increasing order, so each pair comes out as (i, j) with i < j
+            pair_counts.update(combinations(positions, 2))
+    return pair_counts
+
+def write_network_json(filepath: Path, network_data: Dict[str, Any], pretty: bool = False) -> None:
+    """
+    Write a network built by NetworkGenerator.generate_network to a JSON file.
+
+    Compact output is streamed: the envelope is written by hand and the items and links arrays
+    are encoded NETWORK_WRITE_CHUNK elements at a time, so the encoded document never exists in
+    memory as a whole next to the network itself. The bytes are the same as dumps_json's.
+    Pretty-printed output (or an unexpected layout) is encoded in one piece.
+    """
+    network = network_data.get("network")
+    if pretty or list(network_data) != ["network"] or not isinstance(network, dict):
+        with open(os.fspath(filepath), 'wb') as fp:
+            fp.write(dumps_json(network_data, pretty=pretty))
+        return
+
+    with open(os.fspath(filepath), 'wb') as fp:
+        fp.write(b'{"network":{')
+        for index, (key, values) in enumerate(network.items()):
+            fp.write((b',' if index else b'') + dumps_json(key) + b':')
+            if not isinstance(values, list):
+                fp.write(dumps_json(values))
+                continue
+            fp.write(b'[')
+            for start in range(0, len(values), NETWORK_WRITE_CHUNK):
+                if start:
+                    fp.write(b',')
+                fp.write(b','.join(map(dumps_json, values[start:start + NETWORK_WRITE_CHUNK])))
+            fp.write(b']')
+        fp.write(b'}}')
+
 class NetworkGenerator:
     """Generates network structures from detailed citations data."""
     
-    def __init__(self):
-        self.openalex_api = OpenAlexAPI()
+    # Work fields read by _create_node_metadata; full OpenAlex records are many times larger
+    METADATA_FIELDS = [
+        "id", "doi", "ids", "title", "publication_year", "authorships", "cited_by_count",
+        "primary_location", "locations", "biblio"
+    ]
+    # Metadata batches fetched concurrently (paced by the OpenAlex rate limiter)
+    METADATA_WORKERS = 8
+    
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            cache: Optional persistent cache for node metadata (and the OpenAlex client's lookups),
+                so later runs over overlapping identifiers skip those requests.
+        """
+        self.cache = cache
+        self.openalex_api = OpenAlexAPI(cache=cache)
+        # Normalized citations are per year since publication; read the clock once, not per node
+        self.current_year = datetime.datetime.now().year
         self.node_counter = 0
         self.identifier_to_node_id: Dict[str, int] = {}
+        self.node_id_to_identifier: List[str] = []
         self.node_metadata: Dict[int, NodeMetadata] = {}
     
     def generate_network(
@@ -64,7 +212,8 @@ class NetworkGenerator:
             citations_data: Dictionary with structure from detailed_references_citations.json
             mode: Type of linking to perform
             min_strength: Minimum link strength to include
-            max_nodes: Maximum number of nodes to include (None for no limit)
+            max_nodes: Maximum number of nodes to include (None for no limit); the nodes with the
+                highest total link strength are kept
             include_cociting_nodes: Include co-citing papers as nodes (only for co-citation mode)
             amsler_lambda: Lambda weight for Amsler similarity (only for amsler mode)
             
@@ -77,22 +226,6 @@ class NetworkGenerator:
         all_identifiers = self._extract_all_identifiers(citations_data, include_cociting_nodes)
         logger.info(f"Found {len(all_identifiers)} unique identifiers")
         
-        # Limit nodes if specified
-        if max_nodes and len(all_identifiers) > max_nodes:
-            # Prioritize the initial DOIs (keys in citations_data)
-            initial_dois = set(citations_data.keys())
-            other_identifiers = all_identifiers - initial_dois
-            
-            # Keep all initial DOIs and fill up to max_nodes with others
-            remaining_slots = max_nodes - len(initial_dois)
-            if remaining_slots > 0:
-                other_identifiers = list(other_identifiers)[:remaining_slots]
-                all_identifiers = initial_dois | set(other_identifiers)
-            else:
-                all_identifiers = set(list(initial_dois)[:max_nodes])
-            
-            logger.info(f"Limited to {len(all_identifiers)} nodes")
-        
         # Create initial node mappings for all identifiers
         self._create_node_mappings(all_identifiers)
         
@@ -112,9 +245,14 @@ class NetworkGenerator:
             linked_node_ids.add(link.source_id)
             linked_node_ids.add(link.target_id)
         
+        # Limit nodes if specified, before any metadata is fetched for them
+        if max_nodes and len(linked_node_ids) > max_nodes:
+            links, linked_node_ids = self._keep_strongest_nodes(links, max_nodes)
+            logger.info(f"Limited to {len(linked_node_ids)} nodes")
+        
         # Get identifiers for linked nodes only
-        id_to_identifier = {v: k for k, v in self.identifier_to_node_id.items()}
-        linked_identifiers = {id_to_identifier[node_id] for node_id in linked_node_ids}
+        node_id_to_identifier = self.node_id_to_identifier
+        linked_identifiers = {node_id_to_identifier[node_id] for node_id in linked_node_ids}
         
         logger.info(f"Found {len(links)} links between {len(linked_identifiers)} nodes")
         
@@ -128,6 +266,28 @@ class NetworkGenerator:
         
         return network_data
     
+    def _keep_strongest_nodes(self, links: List[NetworkLink], max_nodes: int) -> Tuple[List[NetworkLink], Set[int]]:
+        """
+        Keep the max_nodes nodes with the highest total link strength (ties broken by node id)
+        and the links between them.
+        
+        Returns:
+            The remaining links and the ids of the nodes that still have at least one of them.
+        """
+        total_strength: Counter = Counter()
+        for link in links:
+            total_strength[link.source_id] += link.strength
+            total_strength[link.target_id] += link.strength
+        
+        kept = set(sorted(total_strength, key=lambda node_id: (-total_strength[node_id], node_id))[:max_nodes])
+        links = [link for link in links if link.source_id in kept and link.target_id in kept]
+        
+        linked_node_ids = set()
+        for link in links:
+            linked_node_ids.add(link.source_id)
+            linked_node_ids.add(link.target_id)
+        return links, linked_node_ids
+    
     def _extract_all_identifiers(self, citations_data: Dict[str, Dict[str, List[str]]], include_cociting_nodes: bool = False) -> Set[str]:
         """Extract all unique identifiers from citations data."""
         all_identifiers = set()
@@ -148,12 +308,12 @@ class NetworkGenerator:
     
     def _create_node_mappings(self, identifiers: Set[str]):
         """Create mappings from identifiers to integer node IDs."""
-        self.node_counter = 0
-        self.identifier_to_node_id = {}
-        
-        for identifier in sorted(identifiers):  # Sort for consistency
-            self.identifier_to_node_id[identifier] = self.node_counter
-            self.node_counter += 1
+        # Sorted so a node keeps its ID across runs; hash() order would not (str hashes are
+        # randomized per process), and the sort is small next to link generation
+        # Node IDs are positions in this list, so it doubles as the reverse (ID -> identifier) map
+        self.node_id_to_identifier = sorted(identifiers)
+        self.identifier_to_node_id = {identifier: node_id for node_id, identifier in enumerate(self.node_id_to_identifier)}
+        self.node_counter = len(self.node_id_to_identifier)
     
     def _create_placeholder_metadata(self, identifiers: Set[str]):
         """Create placeholder metadata for all nodes (for testing without API calls)."""
@@ -176,7 +336,7 @@ class NetworkGenerator:
             )
 
     def _fetch_node_metadata(self, identifiers: Set[str]):
-        """Fetch metadata for all nodes using OpenAlex API (once per node)."""
+        """Fetch metadata for all nodes using OpenAlex API (BATCH_SIZE nodes per request)."""
         logger.info("Fetching metadata for nodes...")
         
         # Separate DOIs from other identifiers
@@ -187,71 +347,70 @@ class NetworkGenerator:
         all_identifiers = dois + mag_ids
         metadata_map = {}
         
+        # Serve what earlier runs already fetched from the persistent cache
+        if self.cache is not None:
+            uncached = []
+            for identifier in all_identifiers:
+                cached = self.cache.get(self._metadata_key(identifier))
+                if cached is MISS:
+                    uncached.append(identifier)
+                else:
+                    metadata_map[identifier] = cached
+            if metadata_map:
+                logger.info(f"Loaded metadata for {len(metadata_map)} nodes from cache")
+            all_identifiers = uncached
+        
         if all_identifiers:
             logger.info(f"Fetching metadata for {len(all_identifiers)} nodes from OpenAlex API")
             
-            with tqdm(total=len(all_identifiers), desc="Fetching node metadata") as pbar:
-                # Process DOIs
-                for identifier in dois:
-                    try:
-                        query_id = f"doi:{identifier}" if not identifier.startswith('doi:') else identifier
-                        
-                        # Use pyalex Works API to fetch individual work
-                        from pyalex import Works
-                        work = Works()[query_id]
-                        
-                        if work:
-                            metadata_map[identifier] = work
-                            logger.debug(f"Fetched metadata for DOI: {identifier}")
-                        else:
-                            logger.debug(f"No metadata found for DOI: {identifier}")
-                            metadata_map[identifier] = {}
-                        
-                        # Add small delay to be respectful to API
-                        time.sleep(0.1)
-                                
-                    except Exception as e:
-                        logger.warning(f"Failed to fetch metadata for DOI {identifier}: {e}")
-                    
-                    pbar.update(1)
-                
-                # Process MAG IDs
-                for identifier in mag_ids:
-                    try:
-                        query_id = f"mag:{identifier}" if not identifier.startswith('mag:') else identifier
-                        
-                        # Use pyalex Works API to fetch individual work
-                        from pyalex import Works
-                        work = Works()[query_id]
-                        
-                        if work:
-                            metadata_map[identifier] = work
-                            logger.debug(f"Fetched metadata for MAG ID: {identifier}")
-                        else:
-                            logger.debug(f"No metadata found for MAG ID: {identifier}")
-                            metadata_map[identifier] = {}
-                        
-                        # Add small delay to be respectful to API
-                        time.sleep(0.1)
-                                
-                    except Exception as e:
-                        logger.warning(f"Failed to fetch metadata for MAG ID {identifier}: {e}")
-                    
+            batch_size = self.openalex_api.BATCH_SIZE
+            batches = [all_identifiers[i:i + batch_size] for i in range(0, len(all_identifiers), batch_size)]
+            # Batches are independent, so they are fetched concurrently; the client's shared rate
+            # limiter still paces the requests, and its session retries 429/5xx with backoff
+            with ThreadPoolExecutor(max_workers=self.METADATA_WORKERS, thread_name_prefix="metadata") as executor, \
+                    tqdm(total=len(batches), desc="Fetching node metadata", unit="batch") as pbar:
+                futures = {executor.submit(self._fetch_metadata_batch, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    works = future.result()
+                    if works is not None:
+                        for identifier in batch:
+                            # Identifiers OpenAlex does not know get placeholder metadata
+                            metadata = metadata_map[identifier] = works.get(identifier, {})
+                            if self.cache is not None:
+                                # Unknown identifiers may be indexed later, so they are only kept briefly
+                                self.cache.set(self._metadata_key(identifier), metadata, expire=None if metadata else NEGATIVE_TTL)
+                        logger.debug(f"Fetched metadata for {len(works)}/{len(batch)} nodes")
                     pbar.update(1)
         
         # Create NodeMetadata objects
         logger.info("Creating node metadata objects...")
-        with tqdm(total=len(identifiers), desc="Processing node metadata") as pbar:
-            for identifier in identifiers:
-                node_id = self.identifier_to_node_id[identifier]
-                metadata = metadata_map.get(identifier, {})
-                
-                self.node_metadata[node_id] = self._create_node_metadata(
-                    node_id, identifier, metadata
-                )
-                pbar.update(1)
+        # Iterating through tqdm lets it skip most refreshes, unlike an update(1) call per node
+        for identifier in tqdm(identifiers, desc="Processing node metadata"):
+            node_id = self.identifier_to_node_id[identifier]
+            metadata = metadata_map.get(identifier, {})
+            
+            self.node_metadata[node_id] = self._create_node_metadata(
+                node_id, identifier, metadata
+            )
     
     
+    def _metadata_key(self, identifier: str) -> Tuple[str, str, str]:
+        """Cache key for an identifier's metadata; DOIs are normalized so spelling variants share one entry."""
+        identifier = identifier.lower()
+        for prefix in ("https://doi.org/", "doi:"):
+            if identifier.startswith(prefix):
+                identifier = identifier[len(prefix):]
+        return (type(self).__name__, "metadata", identifier)
+    
+    def _fetch_metadata_batch(self, batch: List[str]) -> Optional[Dict[str, Dict]]:
+        """Fetch the works for one batch of identifiers; returns None if the request fails."""
+        try:
+            return self.openalex_api.get_works(batch, self.METADATA_FIELDS)
+        except Exception as e:
+            logger.warning(f"Failed to fetch metadata for {len(batch)} nodes: {e}")
+            return None
+    
     def _create_node_metadata(self, node_id: int, identifier: str, api_metadata: Dict) -> NodeMetadata:
         """Create NodeMetadata from API response."""
         # Handle None api_metadata
@@ -262,23 +421,21 @@ class NetworkGenerator:
         title = api_metadata.get('title', 'Unknown Title')
         year = api_metadata.get('publication_year')
         
-        # Extract first author surname for label
+        # Collect author names, then take the first author surname for the label
+        authors = [
+            display_name
+            for display_name in ((authorship.get('author') or {}).get('display_name')
+                                 for authorship in api_metadata.get('authorships') or ())
+            if display_name
+        ]
         first_author_surname = "Unknown"
-        authors = []
-        if 'authorships' in api_metadata:
-            for authorship in api_metadata['authorships']:
-                author = authorship.get('author', {})
-                display_name = author.get('display_name', '')
-                if display_name:
-                    authors.append(display_name)
-                    # Get first author surname for label
-                    if first_author_surname == "Unknown":
-                        name_parts = display_name.split()
-                        if name_parts:
-                            first_author_surname = name_parts[-1].lower().capitalize()
+        for display_name in authors:
+            name_parts = display_name.split()
+            if name_parts:
+                first_author_surname = name_parts[-1].lower().capitalize()
+                break
         
         # Create label in format "firstauthor-surname (pubyear)" with Unicode normalization
-        import unicodedata
         # Normalize Unicode characters to ASCII equivalents where possible
         normalized_surname = unicodedata.normalize('NFKD', first_author_surname).encode('ascii', 'ignore').decode('ascii')
         if not normalized_surname:  # If normalization resulted in empty string, keep original
@@ -317,10 +474,10 @@ class NetworkGenerator:
         citations = api_metadata.get('cited_by_count', 0)
         
         # Escape HTML entities to properly handle Unicode characters
-        import html
-        escaped_author = html.escape(author_str or 'Unknown', quote=False)
-        escaped_title = html.escape(title or 'Unknown Title', quote=False)
-        escaped_source = html.escape(source or 'Unknown Source', quote=False)
+        escape = html.escape
+        escaped_author = escape(author_str or 'Unknown', quote=False)
+        escaped_title = escape(title or 'Unknown Title', quote=False)
+        escaped_source = escape(source or 'Unknown Source', quote=False)
         
         description = (
             f"<table>"
@@ -355,46 +512,12 @@ class NetworkGenerator:
         logger.info("Generating bibliographic coupling links...")
         
         # Build reference sets for each paper
-        paper_references: Dict[str, Set[str]] = {}
-        
-        for paper_id, data in citations_data.items():
-            if 'references' in data:
-                # Include all references (not just those in node set)
-                references = set(data['references'])
-                paper_references[paper_id] = references
-        
-        # Calculate bibliographic coupling strength between papers
-        links = []
-        paper_ids = list(paper_references.keys())
-        
-        total_pairs = len(paper_ids) * (len(paper_ids) - 1) // 2
-        with tqdm(total=total_pairs, desc="Computing pairwise bibliographic coupling") as pbar:
-            for i in range(len(paper_ids)):
-                for j in range(i + 1, len(paper_ids)):
-                    pbar.update(1)
-                    paper1, paper2 = paper_ids[i], paper_ids[j]
-                    
-                    # Skip if either paper is not in our node set
-                    if paper1 not in self.identifier_to_node_id or paper2 not in self.identifier_to_node_id:
-                        continue
-                    
-                    # Calculate overlap in references
-                    refs1 = paper_references.get(paper1, set())
-                    refs2 = paper_references.get(paper2, set())
-                    
-                    overlap = len(refs1.intersection(refs2))
-                    
-                    if overlap >= min_strength:
-                        node1_id = self.identifier_to_node_id[paper1]
-                        node2_id = self.identifier_to_node_id[paper2]
-                        
-                        links.append(NetworkLink(
-                            source_id=node1_id,
-                            target_id=node2_id,
-                            strength=float(overlap)
-                        ))
-        
-        return links
+        # Include all references (not just those in node set)
+        paper_references = _interned_sets(citations_data, 'references')
+        
+        papers = self._papers_in_node_set(paper_references)
+        pair_counts = _count_shared([references for _, references in papers], min_count=min_strength)
+        return self._links_from_pair_strengths(papers, pair_counts, min_strength)
     
     def _generate_co_citation_links(
         self, 
@@ -406,52 +529,20 @@ class NetworkGenerator:
         logger.info("Generating co-citation links...")
         
         # Build citation sets for each paper
-        paper_citations: Dict[str, Set[str]] = {}
-        
-        for paper_id, data in citations_data.items():
-            if 'citations' in data:
-                citations = set(data['citations'])
-                
-                if include_cociting_nodes:
-                    # Include all citations as potential nodes (they should already be in node mapping)
-                    paper_citations[paper_id] = citations
-                else:
-                    # Only include citations that are in our node set
-                    citations = citations.intersection(self.identifier_to_node_id.keys())
-                    paper_citations[paper_id] = citations
-        
-        # Calculate co-citation strength between papers
-        links = []
-        paper_ids = list(paper_citations.keys())
-        
-        total_pairs = len(paper_ids) * (len(paper_ids) - 1) // 2
-        with tqdm(total=total_pairs, desc="Computing pairwise co-citation") as pbar:
-            for i in range(len(paper_ids)):
-                for j in range(i + 1, len(paper_ids)):
-                    pbar.update(1)
-                    paper1, paper2 = paper_ids[i], paper_ids[j]
-                    
-                    # Skip if either paper is not in our node set
-                    if paper1 not in self.identifier_to_node_id or paper2 not in self.identifier_to_node_id:
-                        continue
-                    
-                    # Calculate overlap in citations
-                    cites1 = paper_citations.get(paper1, set())
-                    cites2 = paper_citations.get(paper2, set())
-                    
-                    overlap = len(cites1.intersection(cites2))
-                    
-                    if overlap >= min_strength:
-                        node1_id = self.identifier_to_node_id[paper1]
-                        node2_id = self.identifier_to_node_id[paper2]
-                        
-                        links.append(NetworkLink(
-                            source_id=node1_id,
-                            target_id=node2_id,
-                            strength=float(overlap)
-                        ))
-        
-        return links
+        paper_citations = _interned_sets(citations_data, 'citations')
+        
+        if not include_cociting_nodes:
+            # Only include citations that are in our node set
+            # (otherwise all citations are potential nodes, already in the node mapping)
+            # (set.intersection would walk all node identifiers for every paper; probing the
+            # node mapping walks only the paper's own citations)
+            in_node_set = self.identifier_to_node_id.__contains__
+            for paper_id, citations in paper_citations.items():
+                paper_citations[paper_id] = frozenset(filter(in_node_set, citations))
+        
+        papers = self._papers_in_node_set(paper_citations)
+        pair_counts = _count_shared([citations for _, citations in papers], min_count=min_strength)
+        return self._links_from_pair_strengths(papers, pair_counts, min_strength)
     
     def _generate_amsler_links(
         self, 
@@ -463,55 +554,77 @@ class NetworkGenerator:
         logger.info(f"Generating Amsler similarity links with lambda={amsler_lambda}...")
         
         # Build reference and citation sets for each paper
-        paper_references: Dict[str, Set[str]] = {}
-        paper_citations: Dict[str, Set[str]] = {}
-        
-        for paper_id, data in citations_data.items():
-            if 'references' in data:
-                paper_references[paper_id] = set(data['references'])
-            
-            if 'citations' in data:
-                paper_citations[paper_id] = set(data['citations'])
+        paper_references = _interned_sets(citations_data, 'references')
+        paper_citations = _interned_sets(citations_data, 'citations')
         
-        # Calculate Amsler similarity between papers
-        links = []
+        # Each paper is scored on its (references, citations) pair
         paper_ids = list(set(paper_references.keys()) | set(paper_citations.keys()))
+        empty: FrozenSet[str] = frozenset()
+        paper_profiles = {
+            paper_id: (paper_references.get(paper_id, empty), paper_citations.get(paper_id, empty))
+            for paper_id in paper_ids
+        }
         
-        total_pairs = len(paper_ids) * (len(paper_ids) - 1) // 2
-        with tqdm(total=total_pairs, desc="Computing pairwise Amsler similarity") as pbar:
-            for i in range(len(paper_ids)):
-                for j in range(i + 1, len(paper_ids)):
-                    pbar.update(1)
-                    paper1, paper2 = paper_ids[i], paper_ids[j]
-                    
-                    # Skip if either paper is not in our node set
-                    if paper1 not in self.identifier_to_node_id or paper2 not in self.identifier_to_node_id:
-                        continue
-                    
-                    # Calculate bibliographic coupling strength (shared references)
-                    refs1 = paper_references.get(paper1, set())
-                    refs2 = paper_references.get(paper2, set())
-                    bc_strength = len(refs1.intersection(refs2))
-                    
-                    # Calculate co-citation strength (shared citations)
-                    cites1 = paper_citations.get(paper1, set())
-                    cites2 = paper_citations.get(paper2, set())
-                    cc_strength = len(cites1.intersection(cites2))
-                    
-                    # Calculate Amsler similarity: λ * BC + (1-λ) * CC
-                    amsler_strength = amsler_lambda * bc_strength + (1 - amsler_lambda) * cc_strength
-                    
-                    if amsler_strength >= min_strength:
-                        node1_id = self.identifier_to_node_id[paper1]
-                        node2_id = self.identifier_to_node_id[paper2]
-                        
-                        links.append(NetworkLink(
-                            source_id=node1_id,
-                            target_id=node2_id,
-                            strength=float(amsler_strength)
-                        ))
-        
-        return links
+        papers = self._papers_in_node_set(paper_profiles)
+        if amsler_lambda == 1:
+            # Only the bibliographic coupling term has weight; skip counting shared citations
+            pair_strengths = _count_shared([references for _, (references, _) in papers], min_count=min_strength)
+        elif amsler_lambda == 0:
+            # Only the co-citation term has weight; skip counting shared references
+            pair_strengths = _count_shared([citations for _, (_, citations) in papers], min_count=min_strength)
+        else:
+            bc_counts = _count_shared([references for _, (references, _) in papers])
+            cc_counts = _count_shared([citations for _, (_, citations) in papers])
+            # Amsler similarity: λ * BC + (1-λ) * CC, for every pair sharing a reference or a citation
+            pair_strengths = {
+                pair: amsler_lambda * bc_counts.get(pair, 0) + (1 - amsler_lambda) * cc_counts.get(pair, 0)
+                for pair in bc_counts.keys() | cc_counts.keys()
+            }
+        return self._links_from_pair_strengths(papers, pair_strengths, min_strength)
+    
+    def _papers_in_node_set(self, paper_profiles: Dict[str, Any]) -> List[Tuple[int, Any]]:
+        """Return (node_id, profile) for the papers in the node set, in paper_profiles order."""
+        # Papers outside the node set can never be linked, so they are dropped before pairing.
+        # One get() per paper serves as both the membership test and the lookup.
+        node_id_of = self.identifier_to_node_id.get
+        papers = []
+        for paper_id, profile in paper_profiles.items():
+            node_id = node_id_of(paper_id)
+            if node_id is not None:
+                papers.append((node_id, profile))
+        return papers
+    
+    def _links_from_pair_strengths(
+        self,
+        papers: List[Tuple[int, Any]],
+        pair_strengths: Dict[Tuple[int, int], float],
+        min_strength: int
+    ) -> List[NetworkLink]:
+        """
+        Turn strengths keyed by (i, j) positions in papers into links, in the same order as a pairwise scan.
+        
+        Pairs missing from pair_strengths share nothing; they only become (zero-strength) links
+        when min_strength is 0 or less.
+        """
+        if min_strength <= 0:
+            # Strengths are never negative, so every pair qualifies
+            return [
+                NetworkLink(
+                    source_id=papers[i][0],
+                    target_id=papers[j][0],
+                    strength=float(pair_strengths.get((i, j), 0))
+                )
+                for i, j in combinations(range(len(papers)), 2)
+            ]
+        return [
+            NetworkLink(
+                source_id=papers[i][0],
+                target_id=papers[j][0],
+                strength=float(strength)
+            )
+            for (i, j), strength in sorted(pair_strengths.items())
+            if strength >= min_strength
+        ]
     
     def _build_network_structure(self, links: List[NetworkLink]) -> Dict[str, Any]:
         """Build the final network structure in VOSGraph format."""
@@ -523,9 +636,15 @@ class NetworkGenerator:
         
         # Track used coordinates to ensure uniqueness
         used_coordinates = set()
+        # Coordinates for all nodes drawn up front in one call when numpy is available
+        pregenerated = iter(_random_coordinates(len(linked_node_ids)))
         
         def generate_unique_coordinates():
             """Generate unique x, y coordinates."""
+            for coord_tuple in pregenerated:
+                used_coordinates.add(coord_tuple)
+                return coord_tuple
+            
             max_attempts = 10000  # Prevent infinite loop
             attempts = 0
             
@@ -553,15 +672,24 @@ class NetworkGenerator:
             # Ultimate fallback
             return 0.0, 0.0
         
+        # Link count and total link strength per node, in one pass over the links
+        node_link_count: Counter = Counter()
+        node_strength_sum: Dict[int, float] = defaultdict(float)
+        for link in links:
+            node_link_count[link.source_id] += 1
+            node_strength_sum[link.source_id] += link.strength
+            if link.target_id != link.source_id:
+                node_link_count[link.target_id] += 1
+                node_strength_sum[link.target_id] += link.strength
+        
         # Build items (nodes)
         items = []
         for node_id in tqdm(sorted(linked_node_ids), desc="Building network nodes"):
             if node_id in self.node_metadata:
                 metadata = self.node_metadata[node_id]
                 
-                # Calculate link statistics for this node
-                node_links = [link for link in links if link.source_id == node_id or link.target_id == node_id]
-                total_link_strength = sum(link.strength for link in node_links)
+                # Link statistics for this node
+                total_link_strength = node_strength_sum[node_id]
                 
                 # Calculate normalized citations (citations per year since publication)
                 norm_citations = self._calculate_normalized_citations(metadata.citations, metadata.year)
@@ -578,7 +706,7 @@ class NetworkGenerator:
                     "y": y,
                     "cluster": 1,  # Placeholder - would need clustering algorithm
                     "weights": {
-                        "Links": float(len(node_links)),
+                        "Links": float(node_link_count[node_id]),
                         "Total link strength": total_link_strength,
                         "Citations": float(metadata.citations or 0),
                         "Norm. citations": norm_citations
@@ -592,13 +720,10 @@ class NetworkGenerator:
                 items.append(item)
         
         # Build links
-        network_links = []
-        for link in links:
-            network_links.append({
-                "source_id": link.source_id,
-                "target_id": link.target_id,
-                "strength": link.strength
-            })
+        network_links = [
+            {"source_id": source_id, "target_id": target_id, "strength": strength}
+            for source_id, target_id, strength in links
+        ]
         
         return {
             "network": {
@@ -630,12 +755,8 @@ class NetworkGenerator:
         if not citations or not pub_year:
             return 0.0
         
-        # Get current year
-        import datetime
-        current_year = datetime.datetime.now().year
-        
         # Calculate years since publication
-        years_since_publication = current_year - pub_year
+        years_since_publication = self.current_year - pub_year
         
         # If published this year or in future, use 1 year to avoid division by zero
         if years_since_publication <= 0:
@@ -1,11 +1,29 @@
+import codecs
+import functools
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import AbstractSet, Iterator, List, Dict, NamedTuple, Optional, Sequence, Set, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-def parse_ris_file(file_path: Path) -> List[Dict[str, str]]:
+# RIS format: TY<space><space>-<space>VALUE
+# The prefix has a fixed shape, so tag lines are recognised by slicing instead of a regex:
+# 2 uppercase alphanumeric characters, then this separator, then an optional space and the value
+_RIS_SEPARATOR = "  -"
+# Common RIS tags for DOIs
+_DOI_TAGS = ("DO", "DI")
+# The only fields the identifier extractors read (DOI, title for log messages, MAG IDs)
+_IDENTIFIER_TAGS = frozenset(_DOI_TAGS + ('TI', 'T1', 'KW'))
+# DOIs: '10.', a numeric registrant code (optionally with sub-codes), '/', and a non-empty suffix
+_DOI_RE = re.compile(r"10\.\d{3,}(?:\.\d+)*/\S+")
+# MAG IDs are kept as 'mag:XXXXXXXX' lines in the KW field
+_MAG_ID_RE = re.compile(r"^\s*mag:(\d+)\s*$", re.MULTILINE)
+
+def parse_ris_file(file_path: Path, keep_tags: Optional[AbstractSet[str]] = None) -> List[Dict[str, str]]:
     """
     Parses a RIS file and extracts records.
 
@@ -13,81 +31,225 @@ def parse_ris_file(file_path: Path) -> List[Dict[str, str]]:
 
     Args:
         file_path: Path to the RIS file.
+        keep_tags: If given, only these tags are kept in the records; other fields (e.g. long
+            'AB' abstracts) are skipped while parsing instead of being built and stored.
 
     Returns:
         A list of dictionaries, where each dictionary represents a record
         and keys are RIS tags (e.g., 'TY', 'TI', 'DO').
         Returns an empty list if the file cannot be parsed or found.
     """
-    records = []
-    current_record = {}
-    # RIS format: TY<space><space>-<space>VALUE
-    # Regex: matches start, 2 alphanumeric chars OR 'ER', 2 spaces, hyphen, optional space, capture rest
-    ris_line_regex = re.compile(r"^([A-Z0-9]{2}|ER)\s{2}-\s?(.*)$")
-
+    counter = [0]
     try:
-        # Use utf-8-sig to handle potential Byte Order Mark (BOM)
-        with open(file_path, 'r', encoding='utf-8-sig') as f:
-            last_tag = None # Keep track of the last tag for multi-line fields
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue # Skip empty lines
-
-                match = ris_line_regex.match(line)
-                if match:
-                    tag, value = match.groups()
-                    tag = tag.strip()
-                    value = value.strip()
-                    last_tag = tag # Update last tag
-
-                    if tag == 'ER': # End of Record tag
-                        if current_record:
-                            # Clean up potential empty values before appending
-                            cleaned_record = {k: v for k, v in current_record.items() if v}
-                            if cleaned_record:
-                                records.append(cleaned_record)
-                        current_record = {} # Reset for the next record
-                        last_tag = None
-                    elif value: # Only process if value is not empty
-                        # Basic multi-line handling: append to existing key with newline
-                        if tag in current_record:
-                            current_record[tag] += "\n" + value
-                        else:
-                            current_record[tag] = value
-                # Handle continuation lines (lines not matching the regex but belonging to the last tag)
-                # Heuristic: if a line doesn't match the tag format and we have a last_tag
-                # and that tag is already in current_record, append it.
-                # Be cautious with this - might incorrectly merge unrelated lines.
-                # Common for AB (Abstract) or N1 (Notes).
-                elif last_tag and last_tag in current_record and last_tag != 'ER':
-                    # Append with a space or newline? Space might be safer for most text.
-                    current_record[last_tag] += " " + line
-
-                # Handle 'ER' tag even if it doesn't perfectly match the regex (e.g., inconsistent spacing)
-                elif line.strip() == 'ER':
-                    if current_record:
-                        cleaned_record = {k: v for k, v in current_record.items() if v}
-                        if cleaned_record:
-                            records.append(cleaned_record)
-                    current_record = {}
-                    last_tag = None
-
-        # Add the last record if the file doesn't end with an 'ER' tag
-        if current_record:
-            cleaned_record = {k: v for k, v in current_record.items() if v}
-            if cleaned_record:
-                records.append(cleaned_record)
-
-    except FileNotFoundError:
-        logger.error(f"Error: RIS file not found at {file_path}")
+        records = list(_iter_ris(file_path, counter, keep_tags))
+    except Exception as e:
+        _log_parse_error(file_path, e)
         return []
+    logger.info(f"Parsed {len(records)} records from {file_path.name}")
+    return records
+
+
+def iter_ris_records(file_path: Path, keep_tags: Optional[AbstractSet[str]] = None) -> Iterator[Dict[str, str]]:
+    """
+    Like parse_ris_file, but yields the records one at a time while reading the file, so
+    only the record being parsed is held in memory.
+
+    Args:
+        file_path: Path to the RIS file.
+        keep_tags: If given, only these tags are kept in the records.
+
+    Yields:
+        One dictionary per record, keyed by RIS tag. Stops early (after logging the error)
+        if the file cannot be found or read to the end.
+    """
+    try:
+        yield from _iter_ris(file_path, [0], keep_tags)
     except Exception as e:
-        logger.error(f"Error parsing RIS file {file_path}: {e}", exc_info=True) # Log traceback
+        _log_parse_error(file_path, e)
+
+
+def _log_parse_error(file_path: Path, error: Exception) -> None:
+    if isinstance(error, FileNotFoundError):
+        logger.error(f"Error: RIS file not found at {file_path}")
+    else:
+        logger.error(f"Error parsing RIS file {file_path}: {error}", exc_info=error) # Log traceback
+
+
+def _iter_ris(file_path: Path, doi_line_count: List[int], keep_tags: Optional[AbstractSet[str]] = None) -> Iterator[Dict[str, str]]:
+    """
+    Yields the records of a RIS file as they are parsed, raising if the file cannot be read.
+    With `keep_tags`, other fields are dropped; a record made up only of dropped fields is
+    still yielded (as an empty dict), so record counts do not depend on `keep_tags`.
+
+    Also counts the lines that start with a DOI tag ('DO' or 'DI') into `doi_line_count[0]`
+    in the same pass, so callers can sanity-check extraction without reading the file twice.
+    """
+    # Each tag maps to the pieces of its value (text and separators), joined once the record ends
+    current_record = {}
+    # Whether the current record had fields that keep_tags dropped
+    dropped_fields = False
+
+    # Read and decode the whole file in one go, rather than decoding it line by line through a
+    # text-mode file iterator
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    # Skip a potential Byte Order Mark with one prefix check and decode the rest as plain UTF-8
+    # (the memoryview avoids copying the bytes after it)
+    bom_length = len(codecs.BOM_UTF8) if data.startswith(codecs.BOM_UTF8) else 0
+    text = str(memoryview(data)[bom_length:], 'utf-8')
+    del data
+    # Same line endings as text mode: \r\n and \r become \n
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    del text
+
+    last_tag = None # Keep track of the last tag for multi-line fields
+    for line in lines:
+        # One C call, no 2-character slice per line
+        if line.startswith(_DOI_TAGS):
+            doi_line_count[0] += 1
+        line = line.strip()
+        if not line:
+            continue # Skip empty lines
+
+        # Stripping may leave just "XX  -" for a tag with an empty value
+        tag = line[:2]
+        if line[2:5] == _RIS_SEPARATOR and tag.isalnum() and tag.isascii() and tag == tag.upper():
+            value = line[5:].strip()
+            # Only a few dozen distinct tags exist; interned, all records share the same key objects
+            tag = sys.intern(tag)
+            last_tag = tag # Update last tag
+
+            if tag == 'ER': # End of Record tag
+                if current_record or dropped_fields:
+                    yield _join_record(current_record)
+                current_record = {} # Reset for the next record
+                dropped_fields = False
+                last_tag = None
+            elif keep_tags is not None and tag not in keep_tags:
+                # Never stored, so its continuation lines are dropped too
+                dropped_fields = dropped_fields or bool(value)
+            elif value: # Only process if value is not empty
+                # Basic multi-line handling: append to existing key with newline
+                if tag in current_record:
+                    current_record[tag] += ("\n", value)
+                else:
+                    current_record[tag] = [value]
+        # Handle continuation lines (lines not matching the tag format but belonging to the last tag)
+        # Heuristic: if a line doesn't match the tag format and we have a last_tag
+        # and that tag is already in current_record, append it.
+        # Be cautious with this - might incorrectly merge unrelated lines.
+        # Common for AB (Abstract) or N1 (Notes).
+        elif last_tag and last_tag in current_record and last_tag != 'ER':
+            # Append with a space or newline? Space might be safer for most text.
+            current_record[last_tag] += (" ", line)
+
+        # Handle 'ER' tag even if it doesn't perfectly match the tag format (e.g., inconsistent spacing)
+        elif line.strip() == 'ER':
+            if current_record or dropped_fields:
+                yield _join_record(current_record)
+            current_record = {}
+            dropped_fields = False
+            last_tag = None
+
+    # Add the last record if the file doesn't end with an 'ER' tag
+    if current_record or dropped_fields:
+        yield _join_record(current_record)
+
+
+def _join_record(pieces: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Joins the value pieces collected for each tag of a record. Joining once per field avoids
+    re-copying long multi-line fields (abstracts, notes) on every appended line.
+    """
+    # Only non-empty values are ever collected, so no field comes out empty
+    return {tag: "".join(parts) for tag, parts in pieces.items()}
+
+
+class _RisRecordIds(NamedTuple):
+    """What the extractors need from one record; the rest of the record is not kept."""
+    title: str
+    doi: Optional[str] # None if the record has no valid DOI
+    mag_ids: List[str] # MAG IDs in the record's KW field
+
+
+class _RisExtract(NamedTuple):
+    """Everything the public extractors need from one RIS file, gathered in a single parse."""
+    records: List[_RisRecordIds]
+    doi_line_count: int
+
+
+def _record_doi(record: Dict[str, str]) -> Optional[str]:
+    """
+    Returns the record's DOI from its first 'DO'/'DI' field that contains one, lowercased,
+    or None. A DOI is '10.', a numeric registrant code of 3+ digits, '/', and a suffix.
+    """
+    # One C-level check for records without any DOI tag, instead of a loop of lookups
+    if record.keys().isdisjoint(_DOI_TAGS):
+        return None
+    for key in _DOI_TAGS:
+        value = record.get(key)
+        if not value:
+            continue
+        # Also finds DOIs after a label (e.g. "DOI: 10.x/y"); if the field holds several
+        # (e.g. "10.x/y 10.x/z"), the last one is used
+        matches = _DOI_RE.findall(value.lower())
+        if matches:
+            found_doi = matches[-1]
+            # %-style arguments: called for every record, but only formatted when DEBUG is enabled
+            logger.debug("Found potential DOI '%s' in record field %s", found_doi, key)
+            return found_doi
+        logger.debug("Value '%s' in field %s did not look like a DOI.", value.strip(), key)
+    return None
+
+
+def _record_mag_ids(record: Dict[str, str]) -> List[str]:
+    """Returns the MAG IDs listed as 'mag:XXXXXXXX' lines in the record's KW field, in order."""
+    kw_field = record.get('KW')
+    if not kw_field:
         return []
+    # Scans all KW lines in one C-level pass; \d+ is the numeric check MAG IDs need
+    mag_ids = _MAG_ID_RE.findall(kw_field)
+    if mag_ids:
+        logger.debug("Found MAG IDs %s in record KW field", mag_ids)
+    return mag_ids
 
+
+@functools.lru_cache(maxsize=8)
+def _extract_unchanged(path: str, mtime_ns: int, size: int) -> _RisExtract:
+    """
+    Streams the records of the file at `path`, keeping only each record's title and
+    identifiers; memoized per file version.
+    """
+    file_path = Path(path)
+    counter = [0]
+    try:
+        records = [
+            _RisRecordIds(record.get('TI', record.get('T1', '<No Title Found>')), _record_doi(record), _record_mag_ids(record))
+            for record in _iter_ris(file_path, counter, _IDENTIFIER_TAGS)
+        ]
+    except Exception as e:
+        _log_parse_error(file_path, e)
+        return _RisExtract([], 0)
     logger.info(f"Parsed {len(records)} records from {file_path.name}")
-    return records
+    return _RisExtract(records, counter[0])
+
+
+def _parse_and_extract(file_path: Path) -> _RisExtract:
+    """
+    Single entry point for parsing a RIS file and extracting its identifiers.
+
+    The result is reused for as long as the file's modification time and size are unchanged,
+    so callers asking for DOIs and MAG IDs of the same file read and parse it once.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError as e:
+        # Not cached, so a file created later is picked up
+        _log_parse_error(file_path, e)
+        return _RisExtract([], 0)
+    return _extract_unchanged(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
 
 
 def extract_dois_from_ris(file_path: Path) -> List[str]:
@@ -95,8 +257,7 @@ def extract_dois_from_ris(file_path: Path) -> List[str]:
     Extracts unique DOIs from a RIS file.
 
     Handles common DOI tags ('DO', 'DI') and attempts basic validation
-    and cleanup (lowercase, checks for '10.' prefix and '/').
-    Now takes the full value from the DO/DI field without complex regex.
+    and cleanup (lowercase, finds the '10.NNNN/...' DOI within the DO/DI field).
 
     Args:
         file_path: Path to the RIS file.
@@ -105,41 +266,17 @@ def extract_dois_from_ris(file_path: Path) -> List[str]:
         A list of unique, lowercased DOIs found in the file.
         Returns an empty list if parsing fails or no DOIs are found.
     """
-    records = parse_ris_file(file_path)
-    if not records:
+    extract = _parse_and_extract(file_path)
+    if not extract.records:
         return []
 
-    dois = set()
-    doi_keys = ("DO", "DI") # Common RIS tags for DOI
-
-    for record in records:
-        found_doi_in_record = None
-        for key in doi_keys:
-            if key in record and record[key]:
-                potential_doi = record[key].strip()
-                # Basic validation: starts with '10.' and contains '/'
-                if potential_doi.startswith('10.') and '/' in potential_doi:
-                    found_doi_in_record = potential_doi.lower() # Normalize to lowercase
-                    # Optional: Clean up potential extra text? For now, assume the field contains only the DOI.
-                    # Example: If field was "DOI: 10.xxxx/yyyy", this would fail.
-                    # A slightly more robust check could try splitting on space and taking the last part.
-                    parts = found_doi_in_record.split()
-                    if len(parts) > 1 and parts[-1].startswith('10.'):
-                         found_doi_in_record = parts[-1]
-
-                    logger.debug(f"Found potential DOI '{found_doi_in_record}' in record field {key}")
-                    break # Found a DOI using this key, move to next record
-                else:
-                    logger.debug(f"Value '{potential_doi}' in field {key} did not look like a DOI.")
-
-        if found_doi_in_record:
-            dois.add(found_doi_in_record)
-        else:
+    dois = {record.doi for record in extract.records if record.doi}
+    for record in extract.records:
+        if not record.doi:
             # Log records where no DOI was found
-            title = record.get('TI', record.get('T1', '<No Title Found>'))
-            logger.warning(f"No valid DOI found in record: {title[:60]}...")
+            logger.warning(f"No valid DOI found in record: {record.title[:60]}...")
 
-    logger.info(f"Extracted {len(dois)} unique DOIs from {len(records)} records.")
+    logger.info(f"Extracted {len(dois)} unique DOIs from {len(extract.records)} records.")
     return list(dois)
 
 
@@ -156,38 +293,21 @@ def extract_mag_ids_from_ris(file_path: Path) -> List[str]:
         A list of unique MAG IDs found in the file.
         Returns an empty list if parsing fails or no MAG IDs are found.
     """
-    records = parse_ris_file(file_path)
-    if not records:
+    extract = _parse_and_extract(file_path)
+    if not extract.records:
         return []
     
-    mag_ids = set()
-    
-    for record in records:
-        if 'KW' in record and record['KW']:
-            kw_field = record['KW'].strip()
-            # Split KW field by newlines and check each line for mag: prefix
-            for kw_line in kw_field.split('\n'):
-                kw_line = kw_line.strip()
-                if kw_line.startswith('mag:'):
-                    mag_id = kw_line[4:]  # Remove 'mag:' prefix
-                    if mag_id.isdigit():  # Basic validation - MAG IDs are numeric
-                        mag_ids.add(mag_id)
-                        logger.debug(f"Found MAG ID '{mag_id}' in record KW field")
-                    else:
-                        logger.debug(f"Value '{kw_line}' in KW field did not look like a valid MAG ID.")
-        
-        if not mag_ids:
-            # Log records where no MAG ID was found (only if no DOI either)
-            title = record.get('TI', record.get('T1', '<No Title Found>'))
-            has_doi = any(key in record and record[key] for key in ('DO', 'DI'))
-            if not has_doi:
-                logger.debug(f"No MAG ID or DOI found in record: {title[:60]}...")
+    mag_ids = {mag_id for record in extract.records for mag_id in record.mag_ids}
+    for record in extract.records:
+        if not record.mag_ids and not record.doi:
+            # Log records where neither a MAG ID nor a DOI was found
+            logger.debug("No MAG ID or DOI found in record: %.60s...", record.title)
     
-    logger.info(f"Extracted {len(mag_ids)} unique MAG IDs from {len(records)} records.")
+    logger.info(f"Extracted {len(mag_ids)} unique MAG IDs from {len(extract.records)} records.")
     return list(mag_ids)
 
 
-def extract_identifiers_from_ris(file_path: Path) -> tuple[List[str], List[str]]:
+def extract_identifiers_from_ris(file_path: Path) -> Tuple[List[str], List[str]]:
     """
     Extracts both DOIs and MAG IDs from a RIS file.
     
@@ -197,50 +317,65 @@ def extract_identifiers_from_ris(file_path: Path) -> tuple[List[str], List[str]]
     Returns:
         A tuple of (dois, mag_ids) lists.
     """
-    records = parse_ris_file(file_path)
-    if not records:
-        return [], []
+    dois, mag_ids, _ = extract_identifiers_and_doi_line_count(file_path)
+    return list(dois), list(mag_ids)
+
+
+def extract_identifiers_and_doi_line_count(file_path: Path) -> Tuple[Set[str], Set[str], int]:
+    """
+    Extracts both DOIs and MAG IDs from a RIS file, like extract_identifiers_from_ris, and
+    counts the lines tagged 'DO' or 'DI' while parsing, in the same single read of the file.
+
+    A record's MAG ID (the first in its KW field) is only used when it has no DOI.
+
+    Args:
+        file_path: Path to the RIS file.
+
+    Returns:
+        A tuple of (dois, mag_ids, doi_line_count); the identifiers are returned as the sets
+        they are de-duplicated in, without copying them into lists.
+    """
+    extract = _parse_and_extract(file_path)
+    if not extract.records:
+        return set(), set(), extract.doi_line_count
     
-    dois = set()
-    mag_ids = set()
-    doi_keys = ("DO", "DI")
+    dois = {record.doi for record in extract.records if record.doi}
+    # A record's MAG ID is only used when it has no DOI
+    mag_ids = {record.mag_ids[0] for record in extract.records if not record.doi and record.mag_ids}
     
-    for record in records:
-        found_doi = None
-        found_mag_id = None
-        
-        # Try to extract DOI first
-        for key in doi_keys:
-            if key in record and record[key]:
-                potential_doi = record[key].strip()
-                if potential_doi.startswith('10.') and '/' in potential_doi:
-                    found_doi = potential_doi.lower()
-                    parts = found_doi.split()
-                    if len(parts) > 1 and parts[-1].startswith('10.'):
-                        found_doi = parts[-1]
-                    logger.debug(f"Found DOI '{found_doi}' in record field {key}")
-                    break
-        
-        # If no DOI found, try to extract MAG ID from KW field
-        if not found_doi and 'KW' in record and record['KW']:
-            kw_field = record['KW'].strip()
-            for kw_line in kw_field.split('\n'):
-                kw_line = kw_line.strip()
-                if kw_line.startswith('mag:'):
-                    mag_id = kw_line[4:]
-                    if mag_id.isdigit():
-                        found_mag_id = mag_id
-                        logger.debug(f"Found MAG ID '{found_mag_id}' in record KW field")
-                        break
-        
-        # Add to respective sets
-        if found_doi:
-            dois.add(found_doi)
-        elif found_mag_id:
-            mag_ids.add(found_mag_id)
-        else:
-            title = record.get('TI', record.get('T1', '<No Title Found>'))
-            logger.warning(f"No valid DOI or MAG ID found in record: {title[:60]}...")
+    for record in extract.records:
+        if not record.doi and not record.mag_ids:
+            logger.warning(f"No valid DOI or MAG ID found in record: {record.title[:60]}...")
     
-    logger.info(f"Extracted {len(dois)} unique DOIs and {len(mag_ids)} unique MAG IDs from {len(records)} records.")
-    return list(dois), list(mag_ids) 
\ No newline at end of file
+    logger.info(f"Extracted {len(dois)} unique DOIs and {len(mag_ids)} unique MAG IDs from {len(extract.records)} records.")
+    return dois, mag_ids, extract.doi_line_count
+
+
+def extract_identifiers_from_ris_many(file_paths: Sequence[Path], workers: Optional[int] = None) -> Tuple[Set[str], Set[str], int]:
+    """
+    Extracts both DOIs and MAG IDs from several RIS files, like extract_identifiers_and_doi_line_count,
+    parsing them in parallel processes (parsing is CPU-bound, so threads would not help).
+
+    Args:
+        file_paths: Paths to the RIS files.
+        workers: Number of worker processes; defaults to the number of CPUs.
+
+    Returns:
+        A tuple of (dois, mag_ids, doi_line_count), de-duplicated and summed across all files.
+    """
+    dois = set()
+    mag_ids = set()
+    doi_line_count = 0
+    if len(file_paths) <= 1 or workers == 1:
+        # Not worth starting processes for
+        results = list(map(extract_identifiers_and_doi_line_count, file_paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(extract_identifiers_and_doi_line_count, file_paths, chunksize=4))
+    for file_dois, file_mag_ids, file_doi_line_count in results:
+        dois.update(file_dois)
+        mag_ids.update(file_mag_ids)
+        doi_line_count += file_doi_line_count
+
+    logger.info(f"Extracted {len(dois)} unique DOIs and {len(mag_ids)} unique MAG IDs from {len(file_paths)} RIS files.")
+    return dois, mag_ids, doi_line_count
@@ -1,20 +1,65 @@
+import functools
 import os
+import json
+import stat
 import logging
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up, installed with the "fast" extra
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+def loads_json(data: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document, using orjson when it is installed and the stdlib parser otherwise.
+
+    Pass raw response bytes (e.g. ``response.content``) rather than decoded text, so orjson
+    can skip the intermediate str.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_json(data: Any, pretty: bool = False) -> bytes:
+    """
+    Encode `data` as UTF-8 JSON, with orjson when it is installed and the stdlib encoder otherwise.
+
+    Output is compact (no whitespace) by default, which is smaller and faster to write and re-load;
+    `pretty` indents it by 2 spaces for reading. Both encoders produce the same layout. With orjson,
+    numpy scalars and arrays are encoded natively instead of needing conversion to Python objects.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=option)
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
 def load_env_file(env_path: Optional[Path] = None) -> Dict[str, str]:
     """
     Load environment variables from a .env file.
     
+    The parsed contents are cached until the file's modification time or size changes, so
+    repeated lookups only cost a stat.
+
     Args:
         env_path: Path to the .env file. If None, looks for .env in the project root.
     
     Returns:
         Dictionary of environment variables loaded from the file.
     """
+    # Copy, so callers can modify the result without affecting the cache
+    return dict(_cached_env_file(env_path))
+
+def _cached_env_file(env_path: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Does the work of load_env_file, returning the cached dictionary itself; callers within
+    this module only read from it, so they skip the copy.
+    """
     if env_path is None:
         # Look for .env in various locations (project root, parent dirs)
         possible_locations = [
@@ -22,44 +67,69 @@ def load_env_file(env_path: Optional[Path] = None) -> Dict[str, str]:
             Path(__file__).parent.parent / ".env",  # Project root
             Path.home() / ".co-citation-assist.env",  # User's home directory
         ]
-        
-        for loc in possible_locations:
-            if loc.exists():
-                env_path = loc
-                logger.debug(f"Found .env file at {env_path}")
-                break
-    
-    env_vars = {}
-    if env_path and env_path.exists():
-        try:
-            with open(env_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    # Skip empty lines and comments
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    # Parse KEY=VALUE format
-                    if '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        # Remove quotes if present
-                        if value and value[0] == value[-1] and value[0] in ('"', "'"):
-                            value = value[1:-1]
-                        
-                        env_vars[key] = value
-                        # Don't set in os.environ by default - let caller decide
-        
-            logger.info(f"Loaded {len(env_vars)} environment variables from {env_path}")
-        except Exception as e:
-            logger.warning(f"Error loading .env file at {env_path}: {e}")
     else:
-        logger.debug("No .env file found")
+        possible_locations = [env_path]
+
+    for loc in possible_locations:
+        try:
+            # One stat per candidate, doubling as the existence check
+            env_stat = loc.stat()
+        except OSError:
+            continue
+        if not stat.S_ISREG(env_stat.st_mode):
+            continue # e.g. a directory named .env
+        logger.debug(f"Found .env file at {loc}")
+        return _parse_env_file(str(loc), env_stat.st_mtime_ns, env_stat.st_size)
+
+    logger.debug("No .env file found")
+    return {}
+
+@functools.lru_cache(maxsize=8)
+def _parse_env_file(path: str, mtime_ns: int, size: int) -> Dict[str, str]:
+    """Parses the .env file at `path`; memoized per file version (`mtime_ns`, `size`)."""
+    env_vars = {}
+    try:
+        # .env files are tiny: read once and split, rather than iterating a text-mode file
+        for line in Path(path).read_text(encoding='utf-8').splitlines():
+            line = line.strip()
+            # Skip empty lines and comments
+            if not line or line.startswith('#'):
+                continue
+            
+            # Parse KEY=VALUE format
+            if '=' in line:
+                key, value = line.split('=', 1)
+                key = key.strip()
+                value = value.strip()
+                
+                # Remove quotes if present
+                if value and value[0] == value[-1] and value[0] in ('"', "'"):
+                    value = value[1:-1]
+                
+                env_vars[key] = value
+                # Don't set in os.environ by default - let caller decide
+    
+        logger.info(f"Loaded {len(env_vars)} environment variables from {path}")
+    except Exception as e:
+        logger.warning(f"Error loading .env file at {path}: {e}")
     
     return env_vars
 
+def _env_setting(name: str) -> Optional[str]:
+    """
+    Returns the setting `name` from the environment, falling back to the .env file (and then
+    setting it in the environment, so later lookups of it skip the file).
+    """
+    # First check actual environment variable
+    value = os.environ.get(name)
+    if not value:
+        # Try the .env file; its parsed contents are shared by all settings
+        value = _cached_env_file().get(name)
+        # Set in environment for future use
+        if value:
+            os.environ[name] = value
+    return value
+
 def get_openalex_email() -> str:
     """
     Get the email address to use for OpenAlex API requests.
@@ -72,16 +142,7 @@ def get_openalex_email() -> str:
     Returns:
         Email address to use for API requests
     """
-    # First check actual environment variable
-    email = os.environ.get("OPENALEX_EMAIL")
-    
-    if not email:
-        # Try loading from .env file
-        env_vars = load_env_file()
-        email = env_vars.get("OPENALEX_EMAIL")
-        # Set in environment for future use
-        if email:
-            os.environ["OPENALEX_EMAIL"] = email
+    email = _env_setting("OPENALEX_EMAIL")
     
     # Fallback to anonymous
     if not email or not isinstance(email, str) or '@' not in email:
@@ -104,16 +165,7 @@ def get_semantic_scholar_api_key() -> Optional[str]:
     Returns:
         API key to use for Semantic Scholar API requests, or None
     """
-    # First check actual environment variable
-    api_key = os.environ.get("SEMANTIC_SCHOLAR_API_KEY")
-    
-    if not api_key:
-        # Try loading from .env file
-        env_vars = load_env_file()
-        api_key = env_vars.get("SEMANTIC_SCHOLAR_API_KEY")
-        # Set in environment for future use
-        if api_key:
-            os.environ["SEMANTIC_SCHOLAR_API_KEY"] = api_key
+    api_key = _env_setting("SEMANTIC_SCHOLAR_API_KEY")
     
     if api_key:
         logger.debug("Using API key for Semantic Scholar API")
@@ -7,32 +7,68 @@ import json
 import sys
 import unicodedata
 
+try:
+    import orjson
+except ImportError:  # Optional speed-up for large files; falls back to the stdlib json module
+    orjson = None
+
+# Common typographic punctuation that NFKD leaves non-ASCII (and so would be dropped entirely)
+PUNCTUATION_TO_ASCII = str.maketrans({
+    '\u2018': "'", '\u2019': "'", '\u201a': "'",  # single quotes
+    '\u201c': '"', '\u201d': '"', '\u201e': '"',  # double quotes
+    '\u2013': '-', '\u2014': '-', '\u2212': '-',  # en/em dashes, minus
+})
+
 def normalize_unicode_text(text):
     """Normalize Unicode text to ASCII where possible, keeping readability."""
     if not isinstance(text, str):
         return text
+    # Most strings are plain ASCII and have nothing to decode or normalize
+    if text.isascii() and '\\' not in text:
+        return text
     
     # Decode any escaped Unicode sequences first
     try:
-        # Handle escaped Unicode like \u2019
-        decoded = text.encode().decode('unicode_escape')
-        # Normalize to ASCII where possible
-        normalized = unicodedata.normalize('NFKD', decoded).encode('ascii', 'ignore').decode('ascii')
+        # json.load has already decoded real \uXXXX escapes; only strings that still contain a
+        # literal backslash (double-escaped text like \\u2019) need another pass
+        if '\\' in text:
+            # latin-1 with backslashreplace keeps other non-ASCII characters intact through the
+            # round trip (encoding as UTF-8 would turn them into mojibake)
+            decoded = text.encode('latin-1', 'backslashreplace').decode('unicode_escape')
+        else:
+            decoded = text
+        # Normalize to ASCII where possible; punctuation NFKD has no ASCII form for is mapped first
+        normalized = unicodedata.normalize('NFKD', decoded.translate(PUNCTUATION_TO_ASCII)).encode('ascii', 'ignore').decode('ascii')
         # If normalization results in empty string, use original decoded
         return normalized if normalized else decoded
     except:
         return text
 
 def fix_unicode_in_data(data):
-    """Recursively fix Unicode in JSON data structure."""
-    if isinstance(data, dict):
-        return {key: fix_unicode_in_data(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [fix_unicode_in_data(item) for item in data]
-    elif isinstance(data, str):
+    """
+    Fix Unicode in a JSON data structure.
+
+    Dicts and lists are updated in place (and `data` returned), walking them with an explicit
+    stack so deeply nested data needs neither a call per node nor a rebuilt copy of the tree.
+    """
+    if isinstance(data, str):
         return normalize_unicode_text(data)
-    else:
-        return data
+    stack = [data]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, dict):
+            items = container.items()
+        elif isinstance(container, list):
+            items = enumerate(container)
+        else:
+            continue
+        for key, value in items:
+            if isinstance(value, str):
+                # Replacing the value of an existing key is safe while iterating
+                container[key] = normalize_unicode_text(value)
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+    return data
 
 def main():
     if len(sys.argv) != 2:
@@ -43,15 +79,20 @@ def main():
     
     try:
         # Read the JSON file
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(json_file, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw.decode('utf-8'))
         
         # Fix Unicode issues
         fixed_data = fix_unicode_in_data(data)
         
-        # Write back with proper Unicode handling
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(fixed_data, f, indent=2, ensure_ascii=False)
+        # Write back with proper Unicode handling (orjson always writes UTF-8, never \u escapes)
+        if orjson is not None:
+            output = orjson.dumps(fixed_data, option=orjson.OPT_INDENT_2)
+        else:
+            output = json.dumps(fixed_data, indent=2, ensure_ascii=False).encode('utf-8')
+        with open(json_file, 'wb') as f:
+            f.write(output)
         
         print(f"Fixed Unicode issues in {json_file}")
         
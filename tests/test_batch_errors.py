@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+from pathlib import Path
+from typing import List
+
+from co_citation_assist.analyzer import CocitationAnalyzer
+from co_citation_assist.apis.base import CitationAPI, NotFoundError
+from co_citation_assist.cache import MISS, ResponseCache
+
+IDENTIFIERS = [f"10.1000/paper{i}" for i in range(10)]
+FAILING = "10.1000/paper3"
+UNKNOWN = "10.1000/paper5"
+
+
+class FakeAPI(CitationAPI):
+    """Answers every identifier from fixed data, except one that errors and one that is unknown."""
+
+    BATCH_SIZE = 7
+
+    def _lookup(self, identifier: str, direction: str) -> List[str]:
+        if identifier == FAILING:
+            raise RuntimeError("HTTP 500")
+        if identifier == UNKNOWN:
+            raise NotFoundError(identifier)
+        return [f"{identifier}/{direction}/{i}" for i in range(3)]
+
+    def get_references(self, identifier: str) -> List[str]:
+        return self._lookup(identifier, "ref")
+
+    def get_citations(self, identifier: str) -> List[str]:
+        return self._lookup(identifier, "cite")
+
+
+class PerIdentifierFakeAPI(FakeAPI):
+    BATCH_SIZE = 1
+
+
+class DefaultBatchErrorTests(unittest.TestCase):
+    def test_failing_identifier_does_not_drop_rest_of_batch(self):
+        batch = IDENTIFIERS[:FakeAPI.BATCH_SIZE]
+        for method in (FakeAPI().get_references_batch, FakeAPI().get_citations_batch):
+            results = method(batch)
+            self.assertEqual(set(results), set(batch) - {FAILING})
+            self.assertIsNone(results[UNKNOWN])
+            for identifier in batch:
+                if identifier not in (FAILING, UNKNOWN):
+                    self.assertEqual(len(results[identifier]), 3)
+
+    def test_analyzer_batches_match_per_identifier_fetches(self):
+        def collect(api: CitationAPI, cache_dir: str):
+            cache = ResponseCache(Path(cache_dir))
+            analyzer = CocitationAnalyzer(api, set(IDENTIFIERS), max_workers=2, cache=cache)
+            _, raw_data = analyzer.run_base_collection()
+            return raw_data, cache
+
+        with tempfile.TemporaryDirectory() as batched_dir, tempfile.TemporaryDirectory() as per_identifier_dir:
+            batched, batched_cache = collect(FakeAPI(), batched_dir)
+            per_identifier, per_identifier_cache = collect(PerIdentifierFakeAPI(), per_identifier_dir)
+            for identifier in IDENTIFIERS:
+                self.assertEqual(batched[identifier], per_identifier[identifier], identifier)
+            # The failure is reported, not cached as an empty result
+            self.assertEqual(batched[FAILING], {'references': None, 'citations': None})
+            for api_name, cache in (("FakeAPI", batched_cache), ("PerIdentifierFakeAPI", per_identifier_cache)):
+                for method in ('references', 'citations'):
+                    self.assertIs(cache.get((api_name, method, FAILING)), MISS)
+                    self.assertIsNot(cache.get((api_name, method, IDENTIFIERS[0])), MISS)
+            batched_cache.close()
+            per_identifier_cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from pathlib import Path
+
+from co_citation_assist.ris_parser import extract_identifiers_and_doi_line_count, extract_identifiers_from_ris_many
+
+TESTING_DIR = Path(__file__).resolve().parent.parent / "testing"
+RIS_FILES = [TESTING_DIR / "tiab_screening_results.ris", TESTING_DIR / "sample_mag_test.ris"]
+
+
+class ExtractManyTests(unittest.TestCase):
+    def test_merges_per_file_results(self):
+        expected_dois, expected_mag_ids, expected_count = set(), set(), 0
+        for path in RIS_FILES:
+            dois, mag_ids, doi_line_count = extract_identifiers_and_doi_line_count(path)
+            expected_dois |= dois
+            expected_mag_ids |= mag_ids
+            expected_count += doi_line_count
+
+        for workers in (1, 2):
+            dois, mag_ids, doi_line_count = extract_identifiers_from_ris_many(RIS_FILES, workers=workers)
+            self.assertEqual(dois, expected_dois)
+            self.assertEqual(mag_ids, expected_mag_ids)
+            self.assertEqual(doi_line_count, expected_count)
+
+    def test_single_file_matches_per_file_extraction(self):
+        self.assertEqual(
+            extract_identifiers_from_ris_many(RIS_FILES[:1]),
+            extract_identifiers_and_doi_line_count(RIS_FILES[0]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()